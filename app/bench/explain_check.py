@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import sys
+from typing import Any, Iterator
+
+from app.bench.shapes import metric_shapes, query_params, sample_from_db
+from app.config import load_settings
+from app.db import DB
+from app.metrics.executor import build_metric_sql
+from app.metrics.queries import SQL
+
+# EXPLAIN every execute_metric shape and every queries.SQL statement; exit 1 if a plan
+# falls back to a Seq Scan on a big table. Run it on a synthetic dataset of realistic size
+# (app.bench.gen_dataset, >= ~10^5 videos) - on tiny tables seq scans are the right plan.
+
+BIG_TABLES = {"videos", "video_snapshots"}
+
+# whole-table aggregates: a seq scan is a legitimate plan for these
+SEQ_SCAN_OK = {
+    "videos_count_total",
+    "videos_sum_views_total",
+    "count_videos_total",
+}
+
+
+def _walk(node: dict[str, Any]) -> Iterator[dict[str, Any]]:
+    yield node
+    for child in node.get("Plans", []):
+        yield from _walk(child)
+
+
+def seq_scans(plan: list[dict[str, Any]]) -> list[str]:
+    out = []
+    for node in _walk(plan[0]["Plan"]):
+        if node.get("Node Type") == "Seq Scan" and node.get("Relation Name") in BIG_TABLES:
+            out.append(node["Relation Name"])
+    return out
+
+
+def scan_nodes(plan: list[dict[str, Any]]) -> list[str]:
+    out = []
+    for node in _walk(plan[0]["Plan"]):
+        if "Relation Name" in node:
+            idx = node.get("Index Name")
+            out.append(f"{node['Node Type']}({idx or node['Relation Name']})")
+    return out
+
+
+async def _vacuum_analyze(db: DB) -> None:
+    # visibility map must be fresh, otherwise index-only scans still hit the heap
+    assert db.pool is not None
+    async with db.pool.connection() as conn:
+        await conn.set_autocommit(True)
+        try:
+            await conn.execute("VACUUM (ANALYZE) videos")
+            await conn.execute("VACUUM (ANALYZE) video_snapshots")
+        finally:
+            await conn.set_autocommit(False)
+
+
+async def check(db: DB, vacuum: bool = True) -> list[str]:
+    if vacuum:
+        await _vacuum_analyze(db)
+
+    sample = await sample_from_db(db)
+    statements: dict[str, tuple[str, tuple[Any, ...]]] = {}
+    for name, pr in metric_shapes(sample).items():
+        built = build_metric_sql(pr)
+        if built is not None:
+            statements[name] = built
+    for name, params in query_params(sample).items():
+        statements[name] = (SQL[name], params)
+
+    failures = []
+    for name, (sql, params) in statements.items():
+        plan = await db.fetchval("EXPLAIN (FORMAT JSON) " + sql, params)
+        bad = seq_scans(plan)
+        status = "ok"
+        if bad and name not in SEQ_SCAN_OK:
+            status = "SEQ SCAN"
+            failures.append(f"{name}: Seq Scan on {', '.join(bad)}")
+        print(f"{status:<8} {name:<48} {' '.join(scan_nodes(plan))}")
+    return failures
+
+
+async def main(vacuum: bool) -> int:
+    db = DB(load_settings().database_url)
+    await db.connect()
+    try:
+        failures = await check(db, vacuum=vacuum)
+    finally:
+        await db.close()
+    for f in failures:
+        print(f"FAIL {f}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    p = argparse.ArgumentParser(description="Fail if any metric shape plans a Seq Scan")
+    p.add_argument("--no-vacuum", action="store_true", help="skip VACUUM ANALYZE before EXPLAIN")
+    a = p.parse_args()
+    raise SystemExit(asyncio.run(main(vacuum=not a.no_vacuum)))
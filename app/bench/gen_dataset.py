@@ -0,0 +1,171 @@
+from __future__ import annotations
+
+import argparse
+import itertools
+import math
+import random
+import sys
+import uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Iterator
+
+import orjson
+
+UTC = timezone.utc
+
+# Synthetic export in the same shape as app.ingest.load_json consumes:
+#   {"videos": [{id, creator_id, video_created_at, *_count, snapshots: [...]}, ...]}
+# Written in a streaming way, so 10^8 snapshot rows never sit in memory at once.
+
+
+def _uuid(rng: random.Random) -> str:
+    return str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+
+def _poisson_like(rng: random.Random, lam: float) -> int:
+    # exact for small lam, normal approximation for big ones (fast enough for 10^8 rows)
+    if lam <= 0:
+        return 0
+    if lam < 30:
+        limit, k, p = math.exp(-lam), 0, 1.0
+        while True:
+            p *= rng.random()
+            if p <= limit:
+                return k
+            k += 1
+    return max(0, int(round(rng.gauss(lam, math.sqrt(lam)))))
+
+
+def _snapshots(
+    rng: random.Random,
+    video_id: str,
+    published: datetime,
+    hours: int,
+    neg_rate: float,
+) -> tuple[list[dict], tuple[int, int, int, int]]:
+    # popularity is heavy-tailed: most videos get a handful of views, a few go viral
+    popularity = rng.lognormvariate(3.0, 1.6)
+    like_rate = rng.uniform(0.02, 0.08)
+    comment_rate = rng.uniform(0.05, 0.15)
+
+    views = likes = comments = reports = 0
+    first = published.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
+    out: list[dict] = []
+
+    for h in range(hours):
+        decay = (1.0 + h / 24.0) ** -1.2
+        dv = _poisson_like(rng, popularity * decay)
+        dl = _poisson_like(rng, dv * like_rate)
+        dc = _poisson_like(rng, dl * comment_rate)
+        dr = 1 if rng.random() < 0.001 else 0
+
+        # platform corrections: views/likes occasionally go down between two hourly measurements
+        if views and rng.random() < neg_rate:
+            dv = -rng.randint(1, max(1, views // 100 + 1))
+        if likes and rng.random() < neg_rate / 2:
+            dl = -rng.randint(1, max(1, likes // 50 + 1))
+
+        dv = max(dv, -views)
+        dl = max(dl, -likes)
+        views += dv
+        likes += dl
+        comments += dc
+        reports += dr
+
+        out.append(
+            {
+                "id": uuid.UUID(int=rng.getrandbits(128), version=4).hex,
+                "video_id": video_id,
+                "views_count": views,
+                "likes_count": likes,
+                "comments_count": comments,
+                "reports_count": reports,
+                "delta_views_count": dv,
+                "delta_likes_count": dl,
+                "delta_comments_count": dc,
+                "delta_reports_count": dr,
+                "created_at": (first + timedelta(hours=h)).isoformat(),
+            }
+        )
+
+    return out, (views, likes, comments, reports)
+
+
+def iter_videos(
+    creators: int,
+    videos: int,
+    snapshots_per_video: int,
+    start: datetime,
+    days: int,
+    seed: int = 42,
+    neg_rate: float = 0.01,
+) -> Iterator[dict]:
+    rng = random.Random(seed)
+    creator_ids = [uuid.UUID(int=rng.getrandbits(128), version=4).hex for _ in range(max(1, creators))]
+    # zipf-like creator activity: top creators own thousands of videos
+    # cumulative once: rng.choices(weights=...) would rebuild it per video (O(creators) each)
+    cum_weights = list(itertools.accumulate(1.0 / (i + 1) ** 1.1 for i in range(len(creator_ids))))
+    window = days * 86400
+
+    for _ in range(videos):
+        vid = _uuid(rng)
+        published = start + timedelta(seconds=rng.randrange(max(1, window)))
+        # snapshot count varies per video around the configured mean
+        hours = max(1, int(rng.uniform(0.5, 1.5) * snapshots_per_video)) if snapshots_per_video else 0
+        snaps, (views, likes, comments, reports) = _snapshots(rng, vid, published, hours, neg_rate)
+        yield {
+            "id": vid,
+            "creator_id": rng.choices(creator_ids, cum_weights=cum_weights)[0],
+            "video_created_at": published.isoformat(),
+            "views_count": views,
+            "likes_count": likes,
+            "comments_count": comments,
+            "reports_count": reports,
+            "snapshots": snaps,
+        }
+
+
+def write_dataset(out_path: str, **kwargs) -> tuple[int, int]:
+    n_videos = n_snaps = 0
+    with Path(out_path).open("wb") as f:
+        f.write(b'{"videos":[')
+        for v in iter_videos(**kwargs):
+            if n_videos:
+                f.write(b",")
+            f.write(orjson.dumps(v))
+            n_videos += 1
+            n_snaps += len(v["snapshots"])
+            if n_videos % 10_000 == 0:
+                print(f"... videos={n_videos} snapshots={n_snaps}", file=sys.stderr)
+        f.write(b"]}")
+    return n_videos, n_snaps
+
+
+def _parse_args(argv: list[str]) -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Generate a synthetic videos/snapshots JSON export")
+    p.add_argument("out", help="output JSON path")
+    p.add_argument("--creators", type=int, default=100)
+    p.add_argument("--videos", type=int, default=1_000)
+    p.add_argument("--snapshots", type=int, default=24, help="mean hourly snapshots per video")
+    p.add_argument("--start", default="2025-11-01", help="first publication day (UTC, YYYY-MM-DD)")
+    p.add_argument("--days", type=int, default=30, help="publication window length in days")
+    p.add_argument("--neg-rate", type=float, default=0.01, help="probability of a negative hourly views delta")
+    p.add_argument("--seed", type=int, default=42)
+    return p.parse_args(argv)
+
+
+if __name__ == "__main__":
+    a = _parse_args(sys.argv[1:])
+    start = datetime.fromisoformat(a.start).replace(tzinfo=UTC)
+    nv, ns = write_dataset(
+        a.out,
+        creators=a.creators,
+        videos=a.videos,
+        snapshots_per_video=a.snapshots,
+        start=start,
+        days=a.days,
+        seed=a.seed,
+        neg_rate=a.neg_rate,
+    )
+    print(f"Generated videos={nv} snapshots={ns} -> {a.out}")
@@ -0,0 +1,295 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+import orjson
+from aiohttp import web
+
+from app.bench.shapes import QUESTIONS
+
+UTC = timezone.utc
+
+# Replays recorded questions through the real aiogram Dispatcher (app.bot.dp).
+# Telegram and Ollama are replaced by local aiohttp servers; Postgres stays real (DATABASE_URL).
+
+FAKE_TOKEN = "123456:LOADTEST-fake-token-000000000000000"
+
+
+@dataclass
+class FakeOllamaConfig:
+    latency_ms: float = 300.0
+    jitter_ms: float = 100.0
+    error_rate: float = 0.0  # HTTP 500
+    garbage_rate: float = 0.0  # 200 with a non-JSON body -> heuristic fallback
+
+
+@dataclass
+class Counters:
+    ollama_calls: int = 0
+    ollama_errors: int = 0
+    ollama_garbage: int = 0
+    bot_api_calls: int = 0
+    replies: int = 0
+
+
+def _fake_ollama_app(cfg: FakeOllamaConfig, counters: Counters, rng: random.Random) -> web.Application:
+    from app.nlp.parser import _heuristic_parse
+
+    async def generate(request: web.Request) -> web.Response:
+        counters.ollama_calls += 1
+        payload = await request.json()
+        delay = max(0.0, rng.gauss(cfg.latency_ms, cfg.jitter_ms)) / 1000.0
+        await asyncio.sleep(delay)
+
+        r = rng.random()
+        if r < cfg.error_rate:
+            counters.ollama_errors += 1
+            return web.json_response({"error": "injected"}, status=500)
+        if r < cfg.error_rate + cfg.garbage_rate:
+            counters.ollama_garbage += 1
+            return web.json_response({"response": "Извините, не понял вопрос."})
+
+        # answer like a well-behaved model would: JSON for the user question
+        prompt = str(payload.get("prompt", ""))
+        user = prompt.rsplit("USER: ", 1)[-1].rsplit("\nASSISTANT:", 1)[0]
+        pr = _heuristic_parse(user)
+        return web.json_response({"response": orjson.dumps(pr.__dict__).decode()})
+
+    app = web.Application()
+    app.router.add_post("/api/generate", generate)
+    return app
+
+
+def _fake_bot_api_app(counters: Counters) -> web.Application:
+    msg_id = 0
+
+    async def method(request: web.Request) -> web.Response:
+        nonlocal msg_id
+        counters.bot_api_calls += 1
+        name = request.match_info["method"]
+        data = dict(await request.post())
+
+        if name == "getMe":
+            return web.json_response(
+                {"ok": True, "result": {"id": 123456, "is_bot": True, "first_name": "loadtest", "username": "loadtest_bot"}}
+            )
+        if name == "sendMessage":
+            counters.replies += 1
+            msg_id += 1
+            chat_id = int(data.get("chat_id", 0))
+            return web.json_response(
+                {
+                    "ok": True,
+                    "result": {
+                        "message_id": msg_id,
+                        "date": int(time.time()),
+                        "chat": {"id": chat_id, "type": "private"},
+                        "text": data.get("text", ""),
+                    },
+                }
+            )
+        return web.json_response({"ok": True, "result": True})
+
+    app = web.Application()
+    app.router.add_post("/bot{token}/{method}", method)
+    return app
+
+
+async def _serve(app: web.Application) -> tuple[web.AppRunner, str]:
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    host, port = runner.addresses[0][:2]
+    return runner, f"http://{host}:{port}"
+
+
+def load_corpus(path: str | None) -> list[str]:
+    # JSONL ({"text": ...} / {"question": ...}) or plain text, one question per line
+    if not path:
+        return list(QUESTIONS)
+    out: list[str] = []
+    for line in Path(path).read_text(encoding="utf-8").splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        if line.startswith("{"):
+            obj = orjson.loads(line)
+            line = str(obj.get("text") or obj.get("question") or "").strip()
+        if line:
+            out.append(line)
+    return out or list(QUESTIONS)
+
+
+@dataclass
+class RunResult:
+    latencies_ms: list[float] = field(default_factory=list)  # arrival -> reply, queueing included
+    queue_wait_ms: list[float] = field(default_factory=list)  # arrival -> free concurrency slot
+    failures: int = 0
+    wall_sec: float = 0.0
+
+
+def _pct(xs: list[float], q: float) -> float:
+    if not xs:
+        return 0.0
+    xs = sorted(xs)
+    return round(xs[min(len(xs) - 1, int(round(q * (len(xs) - 1))))], 3)
+
+
+async def replay(
+    corpus: list[str],
+    total: int,
+    rate: float,
+    concurrency: int,
+    seed: int,
+) -> RunResult:
+    from aiogram import Bot
+    from aiogram.client.session.aiohttp import AiohttpSession
+    from aiogram.client.telegram import TelegramAPIServer
+    from aiogram.types import Update
+
+    from app.bot import dp, shutdown
+
+    rng = random.Random(seed)
+    res = RunResult()
+    sem = asyncio.Semaphore(concurrency)
+    api_base = os.environ["LOADTEST_BOT_API"]
+
+    session = AiohttpSession(api=TelegramAPIServer.from_base(api_base))
+    bot = Bot(token=FAKE_TOKEN, session=session)
+
+    async def one(i: int, text: str) -> None:
+        # open-loop: the clock starts at arrival, so a saturated bot shows up as queueing
+        t0 = time.perf_counter()
+        async with sem:
+            res.queue_wait_ms.append((time.perf_counter() - t0) * 1000.0)
+            upd = Update.model_validate(
+                {
+                    "update_id": i,
+                    "message": {
+                        "message_id": i,
+                        "date": int(time.time()),
+                        "chat": {"id": 1000 + i % 500, "type": "private"},
+                        "from": {"id": 1000 + i % 500, "is_bot": False, "first_name": "load"},
+                        "text": text,
+                    },
+                },
+                context={"bot": bot},
+            )
+            try:
+                await dp.feed_update(bot, upd)
+            except Exception:
+                res.failures += 1
+                return
+            res.latencies_ms.append((time.perf_counter() - t0) * 1000.0)
+
+    tasks: list[asyncio.Task] = []
+    started = time.perf_counter()
+    try:
+        for i in range(total):
+            tasks.append(asyncio.create_task(one(i + 1, corpus[i % len(corpus)])))
+            if rate > 0:
+                # open-loop Poisson arrivals
+                await asyncio.sleep(rng.expovariate(rate))
+        await asyncio.gather(*tasks)
+    finally:
+        res.wall_sec = time.perf_counter() - started
+        await bot.session.close()
+        await shutdown()
+    return res
+
+
+async def run(args: argparse.Namespace) -> dict[str, Any]:
+    counters = Counters()
+    rng = random.Random(args.seed)
+    ollama_cfg = FakeOllamaConfig(
+        latency_ms=args.llm_latency_ms,
+        jitter_ms=args.llm_jitter_ms,
+        error_rate=args.llm_error_rate,
+        garbage_rate=args.llm_garbage_rate,
+    )
+
+    ollama_runner, ollama_url = await _serve(_fake_ollama_app(ollama_cfg, counters, rng))
+    api_runner, api_url = await _serve(_fake_bot_api_app(counters))
+
+    # handle() reads settings per message, so env is enough to redirect it
+    os.environ["BOT_TOKEN"] = FAKE_TOKEN
+    os.environ["OLLAMA_URL"] = ollama_url
+    os.environ["LOADTEST_BOT_API"] = api_url
+
+    from app.nlp.parser import PARSE_STATS
+
+    before = dict(PARSE_STATS)
+    try:
+        res = await replay(load_corpus(args.corpus), args.count, args.rate, args.concurrency, args.seed)
+    finally:
+        await ollama_runner.cleanup()
+        await api_runner.cleanup()
+
+    llm = PARSE_STATS["llm"] - before["llm"]
+    heur = PARSE_STATS["heuristic"] - before["heuristic"]
+    done = len(res.latencies_ms)
+    return {
+        "meta": {
+            "timestamp": datetime.now(UTC).isoformat(),
+            "count": args.count,
+            "rate": args.rate,
+            "concurrency": args.concurrency,
+            "llm": ollama_cfg.__dict__,
+        },
+        "completed": done,
+        "failures": res.failures,
+        "wall_sec": round(res.wall_sec, 3),
+        "throughput_qps": round(done / res.wall_sec, 2) if res.wall_sec else 0.0,
+        "latency_ms": {
+            "p50": _pct(res.latencies_ms, 0.50),
+            "p95": _pct(res.latencies_ms, 0.95),
+            "p99": _pct(res.latencies_ms, 0.99),
+            "max": _pct(res.latencies_ms, 1.0),
+        },
+        "queue_wait_ms": {
+            "p50": _pct(res.queue_wait_ms, 0.50),
+            "p95": _pct(res.queue_wait_ms, 0.95),
+            "p99": _pct(res.queue_wait_ms, 0.99),
+            "max": _pct(res.queue_wait_ms, 1.0),
+        },
+        "parse_path": {
+            "llm": llm,
+            "heuristic": heur,
+            "llm_share": round(llm / (llm + heur), 3) if llm + heur else 0.0,
+        },
+        "fakes": counters.__dict__,
+    }
+
+
+def _parse_args(argv: list[str]) -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Replay questions through the bot with fake Telegram/Ollama")
+    p.add_argument("--corpus", help="JSONL or plain-text file of recorded questions (default: built-in set)")
+    p.add_argument("--count", type=int, default=500, help="total questions to replay")
+    p.add_argument("--rate", type=float, default=20.0, help="arrival rate, questions/sec (0 = as fast as possible)")
+    p.add_argument("--concurrency", type=int, default=50, help="max in-flight questions")
+    p.add_argument("--llm-latency-ms", type=float, default=300.0)
+    p.add_argument("--llm-jitter-ms", type=float, default=100.0)
+    p.add_argument("--llm-error-rate", type=float, default=0.0)
+    p.add_argument("--llm-garbage-rate", type=float, default=0.0)
+    p.add_argument("--seed", type=int, default=42)
+    p.add_argument("--out", help="write the report as JSON here")
+    return p.parse_args(argv)
+
+
+if __name__ == "__main__":
+    a = _parse_args(sys.argv[1:])
+    report = asyncio.run(run(a))
+    blob = orjson.dumps(report, option=orjson.OPT_INDENT_2)
+    if a.out:
+        Path(a.out).write_bytes(blob)
+    print(blob.decode())
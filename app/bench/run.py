@@ -0,0 +1,229 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Awaitable, Callable
+
+import orjson
+
+from app.bench.shapes import LLM_OUTPUTS, QUESTIONS, metric_shapes, query_params, sample_from_db
+from app.config import load_settings
+from app.db import DB
+from app.ingest import columnar, load_json
+from app.metrics.executor import execute_metric
+from app.metrics.queries import SQL
+from app.nlp.parser import _extract_json, _heuristic_parse, _validate_and_normalize
+
+UTC = timezone.utc
+SUITES = ("ingest", "reload", "queries", "metrics", "parser")
+
+
+def _stats(suite: str, name: str, samples_ms: list[float], **extra: Any) -> dict[str, Any]:
+    xs = sorted(samples_ms)
+    p95 = xs[min(len(xs) - 1, int(round(0.95 * (len(xs) - 1))))]
+    return {
+        "suite": suite,
+        "name": name,
+        "repeat": len(xs),
+        "min_ms": round(xs[0], 3),
+        "median_ms": round(statistics.median(xs), 3),
+        "p95_ms": round(p95, 3),
+        "mean_ms": round(statistics.fmean(xs), 3),
+        **extra,
+    }
+
+
+async def _time_async(fn: Callable[[], Awaitable[Any]], repeat: int, warmup: int) -> list[float]:
+    for _ in range(warmup):
+        await fn()
+    out: list[float] = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        await fn()
+        out.append((time.perf_counter() - t0) * 1000.0)
+    return out
+
+
+async def bench_ingest(dataset: str, repeat: int) -> list[dict[str, Any]]:
+    samples: list[float] = []
+    rows = 0
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        nv, ns = await load_json.main(dataset)
+        samples.append((time.perf_counter() - t0) * 1000.0)
+        rows = nv + ns
+    best_sec = min(samples) / 1000.0
+    return [_stats("ingest", Path(dataset).name, samples, rows=rows, rows_per_sec=round(rows / best_sec, 1))]
+
+
+def bench_reload(dataset: str, repeat: int) -> list[dict[str, Any]]:
+    # JSON decode + _ts parsing vs. the mmap'ed columnar cache (no DB involved)
+    t0 = time.perf_counter()
+    cache = columnar.build_cache(dataset)
+    build_ms = (time.perf_counter() - t0) * 1000.0
+
+    out = [_stats("reload", "columnar_build", [build_ms])]
+    for name, fn in (
+        ("json_rows", lambda: load_json.read_rows(dataset)),
+        ("columnar_rows", lambda: columnar.load_rows(cache)),
+    ):
+        samples = []
+        rows = 0
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            v, s = fn()
+            samples.append((time.perf_counter() - t0) * 1000.0)
+            rows = len(v) + len(s)
+        out.append(_stats("reload", name, samples, rows=rows, rows_per_sec=round(rows / (min(samples) / 1000.0), 1)))
+    return out
+
+
+async def bench_queries(db: DB, repeat: int, warmup: int) -> list[dict[str, Any]]:
+    params = query_params(await sample_from_db(db))
+    out = []
+    for name, sql in SQL.items():
+        p = params[name]
+        samples = await _time_async(lambda: db.fetchval(sql, p), repeat, warmup)
+        out.append(_stats("queries", name, samples))
+    return out
+
+
+async def bench_metrics(db: DB, repeat: int, warmup: int) -> list[dict[str, Any]]:
+    shapes = metric_shapes(await sample_from_db(db))
+    out = []
+    for name, pr in shapes.items():
+        samples = await _time_async(lambda: execute_metric(db, pr), repeat, warmup)
+        out.append(_stats("metrics", name, samples))
+    return out
+
+
+def bench_parser(repeat: int) -> list[dict[str, Any]]:
+    out = []
+
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for q in QUESTIONS:
+            _heuristic_parse(q)
+        samples.append((time.perf_counter() - t0) * 1000.0)
+    out.append(
+        _stats("parser", "heuristic_parse", samples,
+               per_sec=round(len(QUESTIONS) / (min(samples) / 1000.0), 1))
+    )
+
+    pairs = [(q, LLM_OUTPUTS[i % len(LLM_OUTPUTS)]) for i, q in enumerate(QUESTIONS)]
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for q, raw in pairs:
+            _validate_and_normalize(_extract_json(raw), q)
+        samples.append((time.perf_counter() - t0) * 1000.0)
+    out.append(
+        _stats("parser", "llm_output_normalize", samples,
+               per_sec=round(len(pairs) / (min(samples) / 1000.0), 1))
+    )
+    return out
+
+
+def _version() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return "unknown"
+
+
+def compare(results: dict[str, Any], baseline_path: str, tolerance: float) -> list[str]:
+    # regression = median slower than baseline by more than `tolerance` (0.2 -> +20%)
+    base = orjson.loads(Path(baseline_path).read_bytes())
+    old = {(r["suite"], r["name"]): r for r in base.get("results", [])}
+    regressions = []
+    for r in results["results"]:
+        prev = old.get((r["suite"], r["name"]))
+        if not prev or not prev.get("median_ms"):
+            continue
+        ratio = r["median_ms"] / prev["median_ms"]
+        if ratio > 1.0 + tolerance:
+            regressions.append(
+                f"{r['suite']}/{r['name']}: {prev['median_ms']}ms -> {r['median_ms']}ms (x{ratio:.2f})"
+            )
+    return regressions
+
+
+async def run(args: argparse.Namespace) -> dict[str, Any]:
+    suites = args.only or list(SUITES)
+    results: list[dict[str, Any]] = []
+
+    if "ingest" in suites:
+        if not args.dataset:
+            print("ingest suite skipped: --dataset not given", file=sys.stderr)
+        else:
+            results += await bench_ingest(args.dataset, args.ingest_repeat)
+
+    if "reload" in suites:
+        if not args.dataset:
+            print("reload suite skipped: --dataset not given", file=sys.stderr)
+        else:
+            results += bench_reload(args.dataset, args.ingest_repeat)
+
+    if "queries" in suites or "metrics" in suites:
+        db = DB(load_settings().database_url)
+        await db.connect()
+        try:
+            if "queries" in suites:
+                results += await bench_queries(db, args.repeat, args.warmup)
+            if "metrics" in suites:
+                results += await bench_metrics(db, args.repeat, args.warmup)
+        finally:
+            await db.close()
+
+    if "parser" in suites:
+        results += bench_parser(args.repeat)
+
+    return {
+        "meta": {
+            "version": args.label or _version(),
+            "timestamp": datetime.now(UTC).isoformat(),
+            "python": platform.python_version(),
+            "dataset": args.dataset,
+        },
+        "results": results,
+    }
+
+
+def _parse_args(argv: list[str]) -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="End-to-end benchmarks: ingest, SQL shapes, execute_metric, parser")
+    p.add_argument("--dataset", help="JSON export to ingest (see app.bench.gen_dataset)")
+    p.add_argument("--only", nargs="+", choices=SUITES)
+    p.add_argument("--repeat", type=int, default=20)
+    p.add_argument("--warmup", type=int, default=3)
+    p.add_argument("--ingest-repeat", type=int, default=1)
+    p.add_argument("--out", default="bench_results.json", help="machine-readable results")
+    p.add_argument("--label", help="version label stored in results (default: git short sha)")
+    p.add_argument("--baseline", help="previous results JSON to compare against")
+    p.add_argument("--tolerance", type=float, default=0.2)
+    return p.parse_args(argv)
+
+
+if __name__ == "__main__":
+    a = _parse_args(sys.argv[1:])
+    res = asyncio.run(run(a))
+    Path(a.out).write_bytes(orjson.dumps(res, option=orjson.OPT_INDENT_2))
+    for r in res["results"]:
+        print(f"{r['suite']:<8} {r['name']:<48} median={r['median_ms']:>10.3f}ms p95={r['p95_ms']:>10.3f}ms")
+    print(f"Results -> {a.out}")
+
+    if a.baseline:
+        regs = compare(res, a.baseline, a.tolerance)
+        for line in regs:
+            print(f"REGRESSION {line}")
+        if regs:
+            raise SystemExit(1)
@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+from typing import Any
+
+from app.db import DB
+from app.nlp.parser import ParseResult, _month_bounds
+
+UTC = timezone.utc
+
+# RU questions in the style the checker/users send; used for parser throughput and load tests
+QUESTIONS: list[str] = [
+    "Сколько всего видео есть в системе?",
+    "Сколько видео набрало больше 100 000 просмотров за всё время?",
+    "Сколько видео у креатора с id 6b65a6a48b8148f6b38a088ca65ed389 вышло с 1 по 5 ноября 2025 включительно?",
+    "Сколько видео у креатора с id 6b65a6a48b8148f6b38a088ca65ed389 набрали больше 10 000 просмотров по итоговой статистике?",
+    "На сколько просмотров в сумме выросли все видео 28 ноября 2025?",
+    "Сколько разных видео получали новые просмотры 27 ноября 2025?",
+    "Сколько всего есть замеров статистики, в которых число просмотров за час оказалось отрицательным?",
+    "Какое суммарное количество просмотров набрали все видео, опубликованные в июне 2025 года?",
+    "Сколько лайков в сумме набрали все видео по итоговой статистике?",
+    "На сколько лайков в сумме выросли все видео с 1 ноября 2025 по 3 ноября 2025?",
+    "Сколько замеров, где лайков за час стало меньше, чем в предыдущем замере?",
+    "Сколько видео набрало не менее 500 лайков?",
+    "Сколько разных видео креатора с id 6b65a6a48b8148f6b38a088ca65ed389 получали новые просмотры 26 ноября 2025?",
+    "Сколько комментариев в сумме набрали видео, опубликованные 2025-11-10?",
+]
+
+# what a well-behaved model returns for a typical question
+LLM_OUTPUTS: list[str] = [
+    '{"entity": "videos", "operation": "count", "field": "video_id", "comparison": "none", "value": 0}',
+    '{"entity": "videos", "operation": "count", "field": "views", "comparison": "gt", "value": 100000,}',
+    'Ответ: {"entity": "snapshots", "operation": "sum", "field": "delta_views", "comparison": "none", "date": "2025-11-28"}',
+    '{"entity": "snapshots", "operation": "distinct_count", "field": "delta_views", "comparison": "gt", "value": 0, "date": "2025-11-27"}',
+]
+
+
+@dataclass(frozen=True)
+class Sample:
+    creator_id: str
+    day: date
+    month_from: str
+    month_to: str
+    views_threshold: int
+
+
+async def sample_from_db(db: DB) -> Sample:
+    # top creator (worst case for creator-scoped shapes) and the last measured day
+    creator = await db.fetchval(
+        "SELECT creator_id FROM videos GROUP BY creator_id ORDER BY COUNT(*) DESC LIMIT 1"
+    )
+    last = await db.fetchval("SELECT MAX(created_at) FROM video_snapshots")
+    p90 = await db.fetchval(
+        "SELECT percentile_disc(0.9) WITHIN GROUP (ORDER BY views_count) FROM videos"
+    )
+    day = (last or datetime.now(UTC)).astimezone(UTC).date()
+    mf, mt = _month_bounds(day.year, day.month)
+    return Sample(
+        creator_id=str(creator or ""),
+        day=day,
+        month_from=mf,
+        month_to=mt,
+        views_threshold=int(p90 or 0),
+    )
+
+
+def _day_bounds(d: date) -> tuple[datetime, datetime]:
+    start = datetime(d.year, d.month, d.day, tzinfo=UTC)
+    return start, start + timedelta(days=1)
+
+
+def _period_bounds(date_from: str, date_to: str) -> tuple[datetime, datetime]:
+    start = datetime.fromisoformat(date_from).replace(tzinfo=UTC)
+    end = datetime.fromisoformat(date_to).replace(tzinfo=UTC) + timedelta(days=1)
+    return start, end
+
+
+def query_params(s: Sample) -> dict[str, tuple[Any, ...]]:
+    # params for every statement in app.metrics.queries.SQL
+    day_start, day_end = _day_bounds(s.day)
+    month_start, month_end = _period_bounds(s.month_from, s.month_to)
+    return {
+        "count_videos_total": (),
+        "count_videos_by_creator_period": (s.creator_id, month_start, month_end),
+        "count_videos_over_views_all_time": (s.views_threshold,),
+        "count_videos_by_creator_over_views_all_time": (s.creator_id, s.views_threshold),
+        "sum_delta_views_on_date": (day_start, day_end),
+        "count_videos_with_new_views_on_date": (day_start, day_end),
+        "count_negative_view_deltas": (),
+        "sum_views_of_videos_published_in_period": (month_start, month_end),
+    }
+
+
+def metric_shapes(s: Sample) -> dict[str, ParseResult]:
+    # one ParseResult per execute_metric code path (entity x operation x filters)
+    day = s.day.isoformat()
+    c = s.creator_id
+    return {
+        "videos_count_total": ParseResult("videos", "count", "video_id", "none"),
+        "videos_count_views_gt": ParseResult("videos", "count", "views", "gt", s.views_threshold),
+        "videos_count_creator": ParseResult("videos", "count", "video_id", "none", creator_id=c),
+        "videos_count_creator_views_gt": ParseResult("videos", "count", "views", "gt", s.views_threshold, creator_id=c),
+        "videos_count_creator_period": ParseResult(
+            "videos", "count", "video_id", "none", creator_id=c, date_from=s.month_from, date_to=s.month_to
+        ),
+        "videos_count_published_on_date": ParseResult("videos", "count", "video_id", "none", date=day),
+        "videos_sum_views_total": ParseResult("videos", "sum", "views", "none"),
+        "videos_sum_views_creator": ParseResult("videos", "sum", "views", "none", creator_id=c),
+        "videos_sum_views_period": ParseResult(
+            "videos", "sum", "views", "none", date_from=s.month_from, date_to=s.month_to
+        ),
+        "snapshots_count_negative_delta": ParseResult("snapshots", "count", "delta_views", "lt", 0),
+        "snapshots_count_negative_delta_on_date": ParseResult("snapshots", "count", "delta_views", "lt", 0, date=day),
+        "snapshots_sum_delta_on_date": ParseResult("snapshots", "sum", "delta_views", "none", date=day),
+        "snapshots_sum_delta_period": ParseResult(
+            "snapshots", "sum", "delta_views", "none", date_from=s.month_from, date_to=s.month_to
+        ),
+        "snapshots_distinct_new_views_on_date": ParseResult(
+            "snapshots", "distinct_count", "delta_views", "gt", 0, date=day
+        ),
+        "snapshots_sum_delta_creator_on_date": ParseResult(
+            "snapshots", "sum", "delta_views", "none", creator_id=c, date=day
+        ),
+        "snapshots_distinct_new_views_creator_on_date": ParseResult(
+            "snapshots", "distinct_count", "delta_views", "gt", 0, creator_id=c, date=day
+        ),
+    }
@@ -2,20 +2,76 @@ from __future__ import annotations
 
 import asyncio
 import logging
+import time
+from typing import Optional
 
 from aiogram import Bot, Dispatcher, types
 from aiogram.filters import CommandStart
 
-from app.config import load_settings
+from app.config import Settings, load_settings
 from app.db import DB
-from app.metrics.executor import execute_metric
-from app.nlp.parser import parse_query, LLMParseError
+from app.metrics.executor import execute_metric, execute_metrics
+from app.metrics.precompute import HotAnswers
+from app.nlp.parser import ParseResult, parse_query, split_questions, LLMParseError
+from app.nlp.warmup import ModelWarmer
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 dp = Dispatcher()
 
+# shared for the process lifetime (created on first message, closed by shutdown())
+_db: Optional[DB] = None
+_db_lock = asyncio.Lock()
+_llm_gate: Optional[asyncio.Semaphore] = None
+_warmer: Optional[ModelWarmer] = None  # None (e.g. load tests) -> always try the LLM
+_hot: Optional[HotAnswers] = None  # precomputed answers for frequent shapes (started in main)
+_first_answer_logged = False
+
+async def _get_db(s: Settings) -> DB:
+    global _db
+    async with _db_lock:
+        if _db is None:
+            db = DB(s.database_url)
+            await db.connect()
+            _db = db
+    return _db
+
+async def shutdown() -> None:
+    # close what handle() created lazily; for main() and anything driving dp directly (load test)
+    global _db, _llm_gate
+    async with _db_lock:
+        if _db is not None:
+            await _db.close()
+            _db = None
+    _llm_gate = None
+
+def _get_llm_gate(s: Settings) -> asyncio.Semaphore:
+    global _llm_gate
+    if _llm_gate is None:
+        _llm_gate = asyncio.Semaphore(max(1, s.ollama_concurrency))
+    return _llm_gate
+
+async def _parse_safe(s: Settings, text: str, use_llm: bool) -> Optional[ParseResult]:
+    try:
+        return await parse_query(
+            s.ollama_url, s.ollama_model, text,
+            gate=_get_llm_gate(s), use_llm=use_llm, keep_alive=s.ollama_keep_alive,
+        )
+    except Exception:
+        return None
+
+def _log_first_answer(latency_ms: float, use_llm: bool) -> None:
+    global _first_answer_logged
+    if _first_answer_logged or _warmer is None:
+        return
+    _first_answer_logged = True
+    logger.info(
+        "First answer: latency=%.0fms llm=%s, %.1fs after start (LLM cold start=%s)",
+        latency_ms, use_llm, time.monotonic() - _warmer.started_at,
+        f"{_warmer.cold_start_ms:.0f}ms" if _warmer.cold_start_ms is not None else "pending",
+    )
+
 @dp.message(CommandStart())
 async def start(m: types.Message):
     await m.answer("Salom! Rus tilida savol bering. Masalan: «Сколько всего видео есть в системе?»")
@@ -26,34 +82,71 @@ async def handle(m: types.Message):
     if not text:
         return
 
+    t0 = time.perf_counter()
     s = load_settings()
+    questions = split_questions(text)
+    use_llm = _warmer is None or _warmer.ready
 
-    # 1) Parse — NEVER fail outward
-    try:
-        pr = await parse_query(s.ollama_url, s.ollama_model, text)
-    except Exception:
-        # fallback: unknown input → 0
-        await m.answer("0")
-        return
+    # 1) Parse — NEVER fail outward; several questions are parsed concurrently (bounded by the LLM gate)
+    prs = await asyncio.gather(*(_parse_safe(s, q, use_llm) for q in questions))
 
-    # 2) Execute — NEVER fail outward
-    db = DB(s.database_url)
-    await db.connect()
+    # 2) Execute — NEVER fail outward; precomputed hot answers first
+    vals = [0] * len(prs)
     try:
-        val = await execute_metric(db, pr)
+        ok = []
+        for i, pr in enumerate(prs):
+            if pr is None:
+                continue
+            if _hot is not None:
+                _hot.observe(pr)
+                hit = _hot.lookup(pr)
+                if hit is not None:
+                    vals[i] = hit
+                    continue
+            ok.append(i)
+
+        db = await _get_db(s) if ok else None
+        if len(ok) == 1:
+            vals[ok[0]] = await execute_metric(db, prs[ok[0]])
+        elif ok:
+            for i, v in zip(ok, await execute_metrics(db, [prs[i] for i in ok])):
+                vals[i] = v
     except Exception:
-        val = 0
-    finally:
-        await db.close()
+        pass
 
-    # 3) ALWAYS return a number
-    await m.answer(str(int(val)))
+    # 3) ALWAYS return a number (one per question, in order)
+    await m.answer("\n".join(str(int(v)) for v in vals))
+    _log_first_answer((time.perf_counter() - t0) * 1000.0, use_llm)
 
 async def main():
+    global _warmer, _hot
     s = load_settings()
     bot = Bot(token=s.bot_token)
+
+    # load + prime the model in the background; heuristic answers until it is ready
+    _warmer = ModelWarmer(
+        s.ollama_url, s.ollama_model,
+        keep_alive=s.ollama_keep_alive,
+        interval_sec=s.ollama_keepalive_interval_sec,
+    )
+    _warmer.start()
+
+    # learn frequent question shapes, precompute them after every ingest
+    _hot = HotAnswers(
+        await _get_db(s),
+        top_k=s.precompute_top_k,
+        concurrency=s.precompute_concurrency,
+        poll_sec=s.precompute_poll_sec,
+    )
+    _hot.start()
+
     logger.info("Bot started")
-    await dp.start_polling(bot)
+    try:
+        await dp.start_polling(bot)
+    finally:
+        await _hot.stop()
+        await _warmer.stop()
+        await shutdown()
 
 if __name__ == "__main__":
     asyncio.run(main())
@@ -9,15 +9,33 @@ class Settings:
     database_url: str
     ollama_url: str
     ollama_model: str
+    ollama_concurrency: int = 4
+    ollama_keep_alive: str = "30m"
+    ollama_keepalive_interval_sec: float = 240.0
+    precompute_top_k: int = 20
+    precompute_concurrency: int = 2
+    precompute_poll_sec: float = 30.0
 
 def load_settings() -> Settings:
     bot_token = os.environ["BOT_TOKEN"]
     database_url = os.environ["DATABASE_URL"]
     ollama_url = os.environ.get("OLLAMA_URL", "http://127.0.0.1:11434")
     ollama_model = os.environ.get("OLLAMA_MODEL", "qwen2.5:7b-instruct")
+    ollama_concurrency = int(os.environ.get("OLLAMA_CONCURRENCY", "4"))
+    ollama_keep_alive = os.environ.get("OLLAMA_KEEP_ALIVE", "30m")
+    ollama_keepalive_interval_sec = float(os.environ.get("OLLAMA_KEEPALIVE_INTERVAL_SEC", "240"))
+    precompute_top_k = int(os.environ.get("PRECOMPUTE_TOP_K", "20"))
+    precompute_concurrency = int(os.environ.get("PRECOMPUTE_CONCURRENCY", "2"))
+    precompute_poll_sec = float(os.environ.get("PRECOMPUTE_POLL_SEC", "30"))
     return Settings(
         bot_token=bot_token,
         database_url=database_url,
         ollama_url=ollama_url,
         ollama_model=ollama_model,
+        ollama_concurrency=ollama_concurrency,
+        ollama_keep_alive=ollama_keep_alive,
+        ollama_keepalive_interval_sec=ollama_keepalive_interval_sec,
+        precompute_top_k=precompute_top_k,
+        precompute_concurrency=precompute_concurrency,
+        precompute_poll_sec=precompute_poll_sec,
     )
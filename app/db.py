@@ -1,7 +1,9 @@
 from __future__ import annotations
 
-from typing import Optional, Any, Sequence
+from contextlib import asynccontextmanager
+from typing import Optional, Any, AsyncIterator, Sequence
 
+from psycopg import AsyncConnection
 from psycopg_pool import AsyncConnectionPool
 
 
@@ -28,6 +30,28 @@ class DB:
                 row = await cur.fetchone()
                 return row[0] if row else None
 
+    async def fetchrow(self, sql: str, params: Sequence[Any] | None = None) -> Optional[tuple]:
+        assert self.pool is not None
+        async with self.pool.connection() as conn:
+            async with conn.cursor() as cur:
+                await cur.execute(sql, params or ())
+                return await cur.fetchone()
+
+    async def fetchall(self, sql: str, params: Sequence[Any] | None = None) -> list[tuple]:
+        assert self.pool is not None
+        async with self.pool.connection() as conn:
+            async with conn.cursor() as cur:
+                await cur.execute(sql, params or ())
+                return await cur.fetchall()
+
+    @asynccontextmanager
+    async def transaction(self) -> AsyncIterator[AsyncConnection]:
+        # one connection, one transaction: several statements commit (or roll back) together
+        assert self.pool is not None
+        async with self.pool.connection() as conn:
+            async with conn.transaction():
+                yield conn
+
     async def executemany(self, sql: str, rows: list[tuple]) -> None:
         assert self.pool is not None
         async with self.pool.connection() as conn:
@@ -0,0 +1,287 @@
+from __future__ import annotations
+
+import hashlib
+import mmap
+import os
+import struct
+import sys
+from array import array
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Optional
+
+import orjson
+
+from app.ingest.load_json import _ts
+
+UTC = timezone.utc
+EPOCH = datetime(1970, 1, 1, tzinfo=UTC)
+_US = timedelta(microseconds=1)
+
+# Columnar cache of a JSON export: int64 columns (timestamps as epoch microseconds) and
+# dictionary-encoded string ids, read back through mmap without copying.
+#
+#   [sections, each 8-byte aligned] [header JSON] [footer: header offset u64, header length u64, MAGIC]
+#
+# The header records the source JSON (size, mtime, sha256) the cache was built from.
+
+MAGIC = b"VACOLv1\0"
+SUFFIX = ".vcol"
+_FOOTER = struct.Struct("<QQ8s")
+
+VIDEO_COLS = ("v_id", "v_creator", "v_created_us", "v_views", "v_likes", "v_comments", "v_reports")
+SNAP_COLS = (
+    "s_id", "s_video", "s_creator",
+    "s_views", "s_likes", "s_comments", "s_reports",
+    "s_dviews", "s_dlikes", "s_dcomments", "s_dreports",
+    "s_created_us",
+)
+STRING_TABLES = ("video_ids", "creator_ids", "snapshot_ids")
+
+
+class CacheError(Exception):
+    pass
+
+
+def cache_path_for(json_path: str) -> str:
+    return json_path + SUFFIX
+
+
+def sha256_file(path: str) -> str:
+    with open(path, "rb") as f:
+        return hashlib.file_digest(f, "sha256").hexdigest()
+
+
+def _source_info(json_path: str, digest: Optional[str] = None) -> dict[str, Any]:
+    st = os.stat(json_path)
+    return {
+        "path": os.path.abspath(json_path),
+        "size": st.st_size,
+        "mtime_ns": st.st_mtime_ns,
+        "sha256": digest or sha256_file(json_path),
+    }
+
+
+class _Encoder:
+    # string -> dense int code
+    def __init__(self) -> None:
+        self.codes: dict[str, int] = {}
+        self.values: list[str] = []
+
+    def code(self, s: str) -> int:
+        c = self.codes.get(s)
+        if c is None:
+            c = self.codes[s] = len(self.values)
+            self.values.append(s)
+        return c
+
+
+def build_cache(json_path: str, out_path: Optional[str] = None) -> str:
+    out_path = out_path or cache_path_for(json_path)
+    source = _source_info(json_path)
+
+    data = orjson.loads(Path(json_path).read_bytes())
+    videos = data["videos"] if isinstance(data, dict) else data
+
+    cols = {name: array("q") for name in VIDEO_COLS + SNAP_COLS}
+    vids, creators, snap_ids = _Encoder(), _Encoder(), _Encoder()
+    ts_us: dict[str, int] = {}  # hourly snapshots share timestamps
+
+    def us(v: str) -> int:
+        r = ts_us.get(v)
+        if r is None:
+            r = ts_us[v] = (_ts(v) - EPOCH) // _US
+        return r
+
+    for v in videos:
+        vid = str(v["id"])
+        vcode = vids.code(vid)
+        ccode = creators.code(str(v["creator_id"]))
+        cols["v_id"].append(vcode)
+        cols["v_creator"].append(ccode)
+        cols["v_created_us"].append(us(v["video_created_at"]))
+        cols["v_views"].append(int(v.get("views_count", 0)))
+        cols["v_likes"].append(int(v.get("likes_count", 0)))
+        cols["v_comments"].append(int(v.get("comments_count", 0)))
+        cols["v_reports"].append(int(v.get("reports_count", 0)))
+
+        for s in v.get("snapshots", []):
+            cols["s_id"].append(snap_ids.code(str(s["id"])))
+            cols["s_video"].append(vids.code(str(s.get("video_id") or vid)))
+            cols["s_creator"].append(ccode)
+            cols["s_views"].append(int(s.get("views_count", 0)))
+            cols["s_likes"].append(int(s.get("likes_count", 0)))
+            cols["s_comments"].append(int(s.get("comments_count", 0)))
+            cols["s_reports"].append(int(s.get("reports_count", 0)))
+            cols["s_dviews"].append(int(s.get("delta_views_count", 0)))
+            cols["s_dlikes"].append(int(s.get("delta_likes_count", 0)))
+            cols["s_dcomments"].append(int(s.get("delta_comments_count", 0)))
+            cols["s_dreports"].append(int(s.get("delta_reports_count", 0)))
+            cols["s_created_us"].append(us(s["created_at"]))
+
+    header: dict[str, Any] = {
+        "version": 1,
+        "byteorder": sys.byteorder,
+        "source": source,
+        "n_videos": len(cols["v_id"]),
+        "n_snapshots": len(cols["s_id"]),
+        "columns": {},
+        "strings": {},
+    }
+
+    tmp = out_path + ".tmp"
+    with open(tmp, "wb") as f:
+
+        def put(blob: bytes) -> int:
+            off = f.tell()
+            f.write(blob)
+            f.write(b"\0" * (-len(blob) % 8))
+            return off
+
+        for name, arr in cols.items():
+            header["columns"][name] = {"offset": put(arr.tobytes()), "length": len(arr)}
+
+        for name, enc in zip(STRING_TABLES, (vids, creators, snap_ids)):
+            blob = "".join(enc.values).encode("utf-8")
+            offsets = array("q", [0])
+            pos = 0
+            for s in enc.values:
+                pos += len(s.encode("utf-8"))
+                offsets.append(pos)
+            header["strings"][name] = {
+                "count": len(enc.values),
+                "offsets": put(offsets.tobytes()),
+                "data": put(blob),
+                "data_length": len(blob),
+            }
+
+        raw_header = orjson.dumps(header)
+        hoff = f.tell()
+        f.write(raw_header)
+        f.write(_FOOTER.pack(hoff, len(raw_header), MAGIC))
+
+    os.replace(tmp, out_path)
+    return out_path
+
+
+class ColumnarFile:
+    # zero-copy view over a cache file; use as a context manager so the mmap is released
+    def __init__(self, path: str):
+        self.path = path
+        self._f = open(path, "rb")
+        try:
+            self._mm = mmap.mmap(self._f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (ValueError, OSError) as e:  # e.g. empty file
+            self._f.close()
+            raise CacheError(f"{path}: {e}") from e
+        self._views: list[memoryview] = []
+
+        if len(self._mm) < _FOOTER.size:
+            self.close()
+            raise CacheError(f"{path}: too small")
+        hoff, hlen, magic = _FOOTER.unpack_from(self._mm, len(self._mm) - _FOOTER.size)
+        if magic != MAGIC:
+            self.close()
+            raise CacheError(f"{path}: bad magic")
+        try:
+            self.header: dict[str, Any] = orjson.loads(self._mm[hoff:hoff + hlen])
+        except orjson.JSONDecodeError as e:  # truncated/corrupt header
+            self.close()
+            raise CacheError(f"{path}: bad header") from e
+        if self.header.get("byteorder") != sys.byteorder:
+            self.close()
+            raise CacheError(f"{path}: built on a {self.header.get('byteorder')}-endian host")
+
+    def __enter__(self) -> "ColumnarFile":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    def _view(self, offset: int, nbytes: int) -> memoryview:
+        mv = memoryview(self._mm)[offset:offset + nbytes]
+        self._views.append(mv)
+        return mv
+
+    def column(self, name: str) -> memoryview:
+        meta = self.header["columns"][name]
+        mv = self._view(meta["offset"], meta["length"] * 8).cast("q")
+        self._views.append(mv)
+        return mv
+
+    def strings(self, name: str) -> list[str]:
+        meta = self.header["strings"][name]
+        offs = self._view(meta["offsets"], (meta["count"] + 1) * 8).cast("q")
+        self._views.append(offs)
+        blob = bytes(self._view(meta["data"], meta["data_length"]))
+        return [blob[offs[i]:offs[i + 1]].decode("utf-8") for i in range(meta["count"])]
+
+    def close(self) -> None:
+        for mv in reversed(self._views):
+            mv.release()
+        self._views.clear()
+        if not self._mm.closed:
+            self._mm.close()
+        self._f.close()
+
+
+def is_fresh(cache_path: str, json_path: str, verify: bool = False) -> bool:
+    # size+mtime match -> trust the cache; otherwise (or with verify) compare sha256 of the JSON
+    if not os.path.exists(cache_path):
+        return False
+    try:
+        with ColumnarFile(cache_path) as cf:
+            src = cf.header["source"]
+    except (CacheError, ValueError, OSError):
+        return False
+    st = os.stat(json_path)
+    if not verify and st.st_size == src["size"] and st.st_mtime_ns == src["mtime_ns"]:
+        return True
+    return st.st_size == src["size"] and sha256_file(json_path) == src["sha256"]
+
+
+def load_rows(cache_path: str) -> tuple[list[tuple], list[tuple]]:
+    # same row tuples as load_json.rows_from_videos, without JSON decoding or ISO parsing
+    with ColumnarFile(cache_path) as cf:
+        vids = cf.strings("video_ids")
+        creators = cf.strings("creator_ids")
+        snap_ids = cf.strings("snapshot_ids")
+
+        dt_cache: dict[int, datetime] = {}
+
+        def dt(us: int) -> datetime:
+            r = dt_cache.get(us)
+            if r is None:
+                r = dt_cache[us] = EPOCH + timedelta(microseconds=us)
+            return r
+
+        v = [cf.column(n) for n in VIDEO_COLS]
+        video_rows = [
+            (vids[i], creators[c], dt(ts), views, likes, comments, reports)
+            for i, c, ts, views, likes, comments, reports in zip(*v)
+        ]
+
+        s = [cf.column(n) for n in SNAP_COLS]
+        snap_rows = [
+            (snap_ids[i], vids[vc], views, likes, comments, reports, dv, dl, dc, dr, dt(ts), creators[c])
+            for i, vc, c, views, likes, comments, reports, dv, dl, dc, dr, ts in zip(*s)
+        ]
+        del v, s
+    return video_rows, snap_rows
+
+
+def ensure_cache(json_path: str, verify: bool = False) -> str:
+    path = cache_path_for(json_path)
+    if not is_fresh(path, json_path, verify=verify):
+        build_cache(json_path, path)
+    return path
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python -m app.ingest.columnar /path/to/file.json [out.vcol]")
+        raise SystemExit(2)
+
+    out = build_cache(sys.argv[1], sys.argv[2] if len(sys.argv) > 2 else None)
+    with ColumnarFile(out) as cf:
+        print(f"Cached videos={cf.header['n_videos']} snapshots={cf.header['n_snapshots']} -> {out}")
@@ -0,0 +1,316 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import os
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterator, Optional
+
+import orjson
+
+from app.config import load_settings
+from app.db import DB
+from app.ingest.load_json import bump_data_version, rows_from_videos, write_rows
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Long-running ingest: watches a drop directory for *.json / *.ndjson exports and loads them
+# in chunked transactions. Every chunk commits together with its row in ingest_chunks, so a
+# crash resumes from the first uncommitted chunk (migrations/004_ingest_checkpoints.sql).
+
+EXTENSIONS = (".json", ".ndjson", ".jsonl")
+
+
+@dataclass
+class FileProgress:
+    path: str
+    mtime: float
+    fraction: float = 0.0
+
+
+@dataclass
+class IngestMetrics:
+    files_done: int = 0
+    files_failed: int = 0
+    chunks_committed: int = 0
+    chunks_skipped: int = 0
+    videos_committed: int = 0
+    snapshots_committed: int = 0
+    pending: dict[str, float] = field(default_factory=dict)  # path -> mtime
+    running: dict[str, FileProgress] = field(default_factory=dict)
+
+    def lag_seconds(self) -> float:
+        # age of the oldest export that is not fully loaded yet
+        mtimes = list(self.pending.values()) + [p.mtime for p in self.running.values()]
+        return max(0.0, time.time() - min(mtimes)) if mtimes else 0.0
+
+    def render(self) -> str:
+        lines = [
+            f"ingest_files_pending {len(self.pending)}",
+            f"ingest_files_running {len(self.running)}",
+            f"ingest_files_done_total {self.files_done}",
+            f"ingest_files_failed_total {self.files_failed}",
+            f"ingest_chunks_committed_total {self.chunks_committed}",
+            f"ingest_chunks_skipped_total {self.chunks_skipped}",
+            f"ingest_videos_committed_total {self.videos_committed}",
+            f"ingest_snapshots_committed_total {self.snapshots_committed}",
+            f"ingest_lag_seconds {self.lag_seconds():.3f}",
+        ]
+        for p in self.running.values():
+            name = p.path.replace("\\", "\\\\").replace('"', '\\"')
+            lines.append(f'ingest_file_progress{{file="{name}"}} {p.fraction:.4f}')
+        return "\n".join(lines) + "\n"
+
+
+def iter_chunks(path: str, chunk_size: int, skip: set[int]) -> Iterator[tuple[int, Optional[list[dict]], float]]:
+    # yields (chunk_no, videos | None if already committed, progress 0..1); boundaries depend
+    # only on the file content and chunk_size, so they are stable across restarts
+    if path.endswith(".json"):
+        data = orjson.loads(Path(path).read_bytes())
+        videos = data["videos"] if isinstance(data, dict) else data
+        total = max(1, (len(videos) + chunk_size - 1) // chunk_size)
+        for no in range(total):
+            part = None if no in skip else videos[no * chunk_size:(no + 1) * chunk_size]
+            yield no, part, (no + 1) / total
+        return
+
+    size = max(1, os.path.getsize(path))
+    with open(path, "rb") as f:
+        no, buf = 0, []
+        for line in f:
+            if line.strip():
+                buf.append(line)
+            if len(buf) == chunk_size:
+                yield no, None if no in skip else [orjson.loads(x) for x in buf], f.tell() / size
+                no, buf = no + 1, []
+        if buf:
+            yield no, None if no in skip else [orjson.loads(x) for x in buf], 1.0
+
+
+class IngestDaemon:
+    def __init__(
+        self,
+        db: DB,
+        drop_dir: str,
+        chunk_size: int = 1_000,
+        max_files: int = 4,
+        write_concurrency: int = 2,
+        poll_sec: float = 5.0,
+        settle_sec: float = 2.0,
+        retry_sec: float = 60.0,
+    ):
+        self.db = db
+        self.drop_dir = Path(drop_dir)
+        self.chunk_size = chunk_size
+        self.poll_sec = poll_sec
+        self.settle_sec = settle_sec
+        self.retry_sec = retry_sec
+        self.metrics = IngestMetrics()
+
+        self._file_sem = asyncio.Semaphore(max_files)
+        self._write_sem = asyncio.Semaphore(write_concurrency)  # global DB write limit
+        self._seen: dict[str, tuple[int, int]] = {}  # path -> (size, mtime_ns) at last scan
+        self._done: set[tuple[str, int, int]] = set()
+        self._retry_at: dict[str, float] = {}
+        self._tasks: dict[str, asyncio.Task] = {}
+
+    def _candidates(self) -> list[tuple[str, int, int, float]]:
+        out = []
+        for p in sorted(self.drop_dir.iterdir()):
+            if not p.is_file() or p.name.startswith(".") or p.suffix not in EXTENSIONS:
+                continue
+            st = p.stat()
+            key = (str(p), st.st_size, st.st_mtime_ns)
+            prev = self._seen.get(str(p))
+            self._seen[str(p)] = (st.st_size, st.st_mtime_ns)
+            # still being written: wait until size/mtime are stable and old enough
+            if prev != key[1:] or time.time() - st.st_mtime < self.settle_sec:
+                continue
+            if key in self._done:
+                continue
+            out.append((*key, st.st_mtime))
+        return out
+
+    async def scan_once(self) -> None:
+        now = time.time()
+        for path, size, mtime_ns, mtime in self._candidates():
+            if path in self._tasks or self._retry_at.get(path, 0.0) > now:
+                continue
+            self.metrics.pending[path] = mtime
+            self._tasks[path] = asyncio.create_task(self._run_file(path, size, mtime_ns, mtime))
+
+    async def _run_file(self, path: str, size: int, mtime_ns: int, mtime: float) -> None:
+        try:
+            async with self._file_sem:
+                self.metrics.pending.pop(path, None)
+                self.metrics.running[path] = FileProgress(path, mtime)
+                await self.process_file(path, size, mtime_ns)
+                self._done.add((path, size, mtime_ns))
+                self._retry_at.pop(path, None)
+        except Exception as e:
+            self.metrics.files_failed += 1
+            self._retry_at[path] = time.time() + self.retry_sec
+            logger.exception("Ingest failed: %s", path)
+            await self._mark_failed(path, size, mtime_ns, repr(e))
+        finally:
+            self.metrics.pending.pop(path, None)
+            self.metrics.running.pop(path, None)
+            self._tasks.pop(path, None)
+
+    async def _register(self, path: str, size: int, mtime_ns: int) -> tuple[int, str, int]:
+        async with self.db.transaction() as conn:
+            cur = await conn.execute(
+                """
+                INSERT INTO ingest_files (path, size, mtime_ns, chunk_size, status, started_at)
+                VALUES (%s,%s,%s,%s,'running',NOW())
+                ON CONFLICT (path, size, mtime_ns) DO UPDATE SET
+                  status=CASE WHEN ingest_files.status = 'done' THEN 'done' ELSE 'running' END,
+                  started_at=COALESCE(ingest_files.started_at, NOW()),
+                  updated_at=NOW()
+                RETURNING id, status, chunk_size
+                """,
+                (path, size, mtime_ns, self.chunk_size),
+            )
+            row = await cur.fetchone()
+        return int(row[0]), str(row[1]), int(row[2])
+
+    async def _mark_failed(self, path: str, size: int, mtime_ns: int, error: str) -> None:
+        try:
+            async with self.db.transaction() as conn:
+                await conn.execute(
+                    """
+                    UPDATE ingest_files SET status='failed', error=%s, updated_at=NOW()
+                    WHERE path=%s AND size=%s AND mtime_ns=%s AND status <> 'done'
+                    """,
+                    (error[:2000], path, size, mtime_ns),
+                )
+        except Exception:
+            logger.exception("Could not record failure for %s", path)
+
+    async def process_file(self, path: str, size: int, mtime_ns: int) -> None:
+        file_id, status, chunk_size = await self._register(path, size, mtime_ns)
+        if status == "done":
+            return
+
+        rows = await self.db.fetchall("SELECT chunk_no FROM ingest_chunks WHERE file_id = %s", (file_id,))
+        committed = {int(r[0]) for r in rows}
+        if committed:
+            logger.info("Resuming %s: %d chunks already committed", path, len(committed))
+
+        # chunk_size is pinned per file: resumed runs must cut the same boundaries
+        it = iter_chunks(path, chunk_size, committed)
+        total = 0
+        while True:
+            item = await asyncio.to_thread(next, it, None)
+            if item is None:
+                break
+            no, videos, progress = item
+            total = no + 1
+            if videos is None:
+                self.metrics.chunks_skipped += 1
+            else:
+                video_rows, snap_rows = await asyncio.to_thread(rows_from_videos, videos)
+                async with self._write_sem:
+                    async with self.db.transaction() as conn:
+                        await write_rows(conn, video_rows, snap_rows)
+                        await conn.execute(
+                            "INSERT INTO ingest_chunks (file_id, chunk_no, videos, snapshots) VALUES (%s,%s,%s,%s)",
+                            (file_id, no, len(video_rows), len(snap_rows)),
+                        )
+                self.metrics.chunks_committed += 1
+                self.metrics.videos_committed += len(video_rows)
+                self.metrics.snapshots_committed += len(snap_rows)
+            if path in self.metrics.running:
+                self.metrics.running[path].fraction = progress
+
+        async with self.db.transaction() as conn:
+            await conn.execute(
+                """
+                UPDATE ingest_files
+                SET status='done', total_chunks=%s, error=NULL, finished_at=NOW(), updated_at=NOW()
+                WHERE id=%s
+                """,
+                (total, file_id),
+            )
+            await bump_data_version(conn)
+        self.metrics.files_done += 1
+        logger.info("Ingested %s: chunks=%d", path, total)
+
+    async def run(self, log_every_sec: float = 30.0) -> None:
+        logger.info("Watching %s", self.drop_dir)
+        last_log = 0.0
+        while True:
+            try:
+                await self.scan_once()
+            except Exception:
+                logger.exception("Scan failed")
+            if time.monotonic() - last_log >= log_every_sec:
+                last_log = time.monotonic()
+                m = self.metrics
+                logger.info(
+                    "ingest: pending=%d running=%d done=%d failed=%d chunks=%d lag=%.1fs",
+                    len(m.pending), len(m.running), m.files_done, m.files_failed,
+                    m.chunks_committed, m.lag_seconds(),
+                )
+            await asyncio.sleep(self.poll_sec)
+
+
+async def serve_metrics(metrics: IngestMetrics, host: str, port: int) -> asyncio.AbstractServer:
+    # minimal Prometheus text endpoint (any path)
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            await reader.readuntil(b"\r\n\r\n")
+            body = metrics.render().encode()
+            writer.write(
+                b"HTTP/1.1 200 OK\r\nContent-Type: text/plain; version=0.0.4\r\n"
+                + f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode()
+                + body
+            )
+            await writer.drain()
+        except Exception:
+            pass
+        finally:
+            writer.close()
+
+    return await asyncio.start_server(handle, host, port)
+
+
+async def main(args: argparse.Namespace) -> None:
+    db = DB(load_settings().database_url)
+    await db.connect()
+    daemon = IngestDaemon(
+        db,
+        args.drop_dir,
+        chunk_size=args.chunk_size,
+        max_files=args.max_files,
+        write_concurrency=args.write_concurrency,
+        poll_sec=args.poll_sec,
+        settle_sec=args.settle_sec,
+    )
+    server = None
+    if args.metrics_port:
+        server = await serve_metrics(daemon.metrics, args.metrics_host, args.metrics_port)
+        logger.info("Metrics on http://%s:%d/metrics", args.metrics_host, args.metrics_port)
+    try:
+        await daemon.run()
+    finally:
+        if server:
+            server.close()
+        await db.close()
+
+
+if __name__ == "__main__":
+    p = argparse.ArgumentParser(description="Watch a drop directory and ingest JSON/NDJSON exports")
+    p.add_argument("drop_dir")
+    p.add_argument("--chunk-size", type=int, default=1_000, help="videos per transaction")
+    p.add_argument("--max-files", type=int, default=4, help="files processed concurrently")
+    p.add_argument("--write-concurrency", type=int, default=2, help="global limit of concurrent write transactions")
+    p.add_argument("--poll-sec", type=float, default=5.0)
+    p.add_argument("--settle-sec", type=float, default=2.0, help="min age of a file before it is picked up")
+    p.add_argument("--metrics-host", default="0.0.0.0")
+    p.add_argument("--metrics-port", type=int, default=0, help="Prometheus text endpoint (0 = off)")
+    asyncio.run(main(p.parse_args()))
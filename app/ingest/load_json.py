@@ -1,13 +1,16 @@
 from __future__ import annotations
 
 import sys
+import uuid
 from datetime import datetime, timezone
 from pathlib import Path
+from typing import Any, Iterable
 
 import orjson
 
 from app.config import load_settings
 from app.db import DB
+from app.metrics import creator_stats, summary
 
 UTC = timezone.utc
 
@@ -21,16 +24,54 @@ def _ts(v: str) -> datetime:
     return dt
 
 
-async def main(json_path: str) -> None:
-    settings = load_settings()
-    db = DB(settings.database_url)
-    await db.connect()
-
-    raw = Path(json_path).read_bytes()
-    data = orjson.loads(raw)
-
-    videos = data["videos"] if isinstance(data, dict) else data
-
+VIDEO_UPSERT_SQL = """
+    INSERT INTO videos (
+      id, creator_id, video_created_at,
+      views_count, likes_count, comments_count, reports_count
+    )
+    VALUES (%s,%s,%s,%s,%s,%s,%s)
+    ON CONFLICT (id) DO UPDATE SET
+      creator_id=EXCLUDED.creator_id,
+      video_created_at=EXCLUDED.video_created_at,
+      views_count=EXCLUDED.views_count,
+      likes_count=EXCLUDED.likes_count,
+      comments_count=EXCLUDED.comments_count,
+      reports_count=EXCLUDED.reports_count,
+      updated_at=NOW()
+    WHERE (videos.creator_id, videos.video_created_at,
+           videos.views_count, videos.likes_count, videos.comments_count, videos.reports_count)
+      IS DISTINCT FROM
+          (EXCLUDED.creator_id, EXCLUDED.video_created_at,
+           EXCLUDED.views_count, EXCLUDED.likes_count, EXCLUDED.comments_count, EXCLUDED.reports_count)
+"""
+
+SNAPSHOT_UPSERT_SQL = """
+    INSERT INTO video_snapshots (
+      id, video_id,
+      views_count, likes_count, comments_count, reports_count,
+      delta_views_count, delta_likes_count, delta_comments_count, delta_reports_count,
+      created_at, creator_id
+    )
+    VALUES  (%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s)
+    ON CONFLICT (id) DO UPDATE SET
+      video_id=EXCLUDED.video_id,
+      views_count=EXCLUDED.views_count,
+      likes_count=EXCLUDED.likes_count,
+      comments_count=EXCLUDED.comments_count,
+      reports_count=EXCLUDED.reports_count,
+      delta_views_count=EXCLUDED.delta_views_count,
+      delta_likes_count=EXCLUDED.delta_likes_count,
+      delta_comments_count=EXCLUDED.delta_comments_count,
+      delta_reports_count=EXCLUDED.delta_reports_count,
+      created_at=EXCLUDED.created_at,
+      creator_id=EXCLUDED.creator_id,
+      updated_at=NOW()
+"""
+
+_FETCH_BATCH = 10_000
+
+
+def rows_from_videos(videos: Iterable[dict]) -> tuple[list[tuple], list[tuple]]:
     video_rows: list[tuple] = []
     snap_rows: list[tuple] = []
 
@@ -64,62 +105,91 @@ async def main(json_path: str) -> None:
                     int(s.get("delta_comments_count", 0)),
                     int(s.get("delta_reports_count", 0)),
                     _ts(s["created_at"]),
+                    creator_id,
                 )
             )
 
-    await db.executemany(
-        """
-        INSERT INTO videos (
-          id, creator_id, video_created_at,
-          views_count, likes_count, comments_count, reports_count
+    return video_rows, snap_rows
+
+
+async def fetch_current(cur: Any, ids: list[str]) -> dict[str, tuple]:
+    # current state of the videos about to be upserted; locked until commit
+    out: dict[str, tuple] = {}
+    for i in range(0, len(ids), _FETCH_BATCH):
+        await cur.execute(
+            """
+            SELECT id, creator_id, video_created_at,
+                   views_count, likes_count, comments_count, reports_count
+            FROM videos
+            WHERE id = ANY(%s::uuid[])
+            FOR UPDATE
+            """,
+            (ids[i:i + _FETCH_BATCH],),
         )
-        VALUES (%s,%s,%s,%s,%s,%s,%s)
-        ON CONFLICT (id) DO UPDATE SET
-          creator_id=EXCLUDED.creator_id,
-          video_created_at=EXCLUDED.video_created_at,
-          views_count=EXCLUDED.views_count,
-          likes_count=EXCLUDED.likes_count,
-          comments_count=EXCLUDED.comments_count,
-          reports_count=EXCLUDED.reports_count,
-          updated_at=NOW()
-        """,
-        video_rows,
-    )
+        for row in await cur.fetchall():
+            out[str(row[0])] = (str(row[0]), *row[1:])
+    return out
+
+
+async def write_rows(conn: Any, video_rows: list[tuple], snap_rows: list[tuple]) -> None:
+    # caller owns the transaction (DB.transaction); counters commit together with the rows
+    canon = [(str(uuid.UUID(r[0])), *r[1:]) for r in video_rows]
+    async with conn.cursor() as cur:
+        # per-video locks from the old/new diff to commit: concurrent chunks carrying the
+        # same new video would otherwise both count it; chunks with disjoint ids don't wait
+        ids = sorted({r[0] for r in canon})
+        await creator_stats.lock_videos(cur, ids)
+        old = await fetch_current(cur, ids)
+        await cur.executemany(VIDEO_UPSERT_SQL, video_rows)
+        await cur.executemany(SNAPSHOT_UPSERT_SQL, snap_rows)
+        await creator_stats.apply_changes(cur, old, canon)
+        await summary.apply_changes(cur, old, canon)
+
+
+async def bump_data_version(conn_or_cur: Any) -> None:
+    # tells the bot that precomputed answers are stale (app.metrics.precompute);
+    # once per completed load, not per chunk, so a long ingest doesn't keep flushing the cache
+    await conn_or_cur.execute("UPDATE data_version SET version = version + 1, updated_at = NOW()")
+
+
+def read_rows(path: str, use_cache: bool = False) -> tuple[list[tuple], list[tuple]]:
+    # *.vcol -> columnar cache directly; use_cache -> build/refresh <json>.vcol and read from it
+    from app.ingest import columnar
+
+    if path.endswith(columnar.SUFFIX):
+        return columnar.load_rows(path)
+    if use_cache:
+        return columnar.load_rows(columnar.ensure_cache(path))
+
+    raw = Path(path).read_bytes()
+    data = orjson.loads(raw)
 
-    await db.executemany(
-        """
-        INSERT INTO video_snapshots (
-          id, video_id,
-          views_count, likes_count, comments_count, reports_count,
-          delta_views_count, delta_likes_count, delta_comments_count, delta_reports_count,
-          created_at
-        )
-        VALUES  (%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s)
-        ON CONFLICT (id) DO UPDATE SET
-          video_id=EXCLUDED.video_id,
-          views_count=EXCLUDED.views_count,
-          likes_count=EXCLUDED.likes_count,
-          comments_count=EXCLUDED.comments_count,
-          reports_count=EXCLUDED.reports_count,
-          delta_views_count=EXCLUDED.delta_views_count,
-          delta_likes_count=EXCLUDED.delta_likes_count,
-          delta_comments_count=EXCLUDED.delta_comments_count,
-          delta_reports_count=EXCLUDED.delta_reports_count,
-          created_at=EXCLUDED.created_at,
-          updated_at=NOW()
-        """,
-        snap_rows,
-    )
+    videos = data["videos"] if isinstance(data, dict) else data
+    return rows_from_videos(videos)
+
+
+async def main(json_path: str, use_cache: bool = False) -> tuple[int, int]:
+    settings = load_settings()
+    db = DB(settings.database_url)
+    await db.connect()
+
+    video_rows, snap_rows = read_rows(json_path, use_cache=use_cache)
+
+    async with db.transaction() as conn:
+        await write_rows(conn, video_rows, snap_rows)
+        await bump_data_version(conn)
 
     await db.close()
     print(f"Loaded videos={len(video_rows)} snapshots={len(snap_rows)}")
+    return len(video_rows), len(snap_rows)
 
 
 if __name__ == "__main__":
-    if len(sys.argv) < 2:
-        print("Usage: python -m app.ingest.load_json /path/to/file.json")
+    args = [a for a in sys.argv[1:] if a != "--cache"]
+    if len(args) < 1:
+        print("Usage: python -m app.ingest.load_json /path/to/file.json [--cache] | /path/to/file.json.vcol")
         raise SystemExit(2)
 
     import asyncio
 
-    asyncio.run(main(sys.argv[1]))
+    asyncio.run(main(args[0], use_cache="--cache" in sys.argv[1:]))
@@ -0,0 +1,222 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import sys
+from collections import defaultdict
+from datetime import date, datetime, timezone
+from typing import Any, Optional
+
+from app.config import load_settings
+from app.db import DB
+from app.nlp.parser import ParseResult
+
+UTC = timezone.utc
+
+# Video row layout shared with app.ingest.load_json:
+#   (id, creator_id, video_created_at, views, likes, comments, reports)
+VideoRow = tuple
+
+# transaction-level advisory locks around counter bookkeeping. A video inserted by another
+# still-open transaction is invisible to SELECT ... FOR UPDATE, so two concurrent writers
+# carrying the same new video would both count it: ingest locks each video id it is about to
+# diff (chunks with disjoint ids still run in parallel), and holds COUNTERS_LOCK_KEY shared
+# so that rebuilds, which take it exclusively, wait for in-flight ingest and block new ones.
+COUNTERS_LOCK_KEY = 0x76696465_6F730001
+
+
+async def lock_counters(conn_or_cur: Any) -> None:
+    await conn_or_cur.execute("SELECT pg_advisory_xact_lock(%s)", (COUNTERS_LOCK_KEY,))
+
+
+async def lock_videos(conn_or_cur: Any, video_ids: list[str]) -> None:
+    await conn_or_cur.execute("SELECT pg_advisory_xact_lock_shared(%s)", (COUNTERS_LOCK_KEY,))
+    # sorted by key (DISTINCT keeps the subquery, and its ORDER BY, from being flattened)
+    # -> every writer takes them in the same order, no deadlocks
+    await conn_or_cur.execute(
+        """
+        SELECT pg_advisory_xact_lock(k)
+        FROM (SELECT DISTINCT hashtextextended(id, 0) AS k FROM unnest(%s::text[]) AS id ORDER BY k) AS keys
+        """,
+        (video_ids,),
+    )
+
+
+STAT_COLS = ("views_count", "likes_count", "comments_count", "reports_count")
+FIELD_TO_COL = {"views": "views_count", "likes": "likes_count", "comments": "comments_count", "reports": "reports_count"}
+
+
+def _day(ts: datetime) -> date:
+    return ts.astimezone(UTC).date()
+
+
+def collect_deltas(
+    old: dict[str, VideoRow],
+    new_rows: list[VideoRow],
+) -> tuple[dict[str, list[int]], dict[tuple[str, date], int]]:
+    # old: current DB rows keyed by video id (before the upsert); only changed rows produce deltas
+    totals: dict[str, list[int]] = defaultdict(lambda: [0, 0, 0, 0, 0])
+    daily: dict[tuple[str, date], int] = defaultdict(int)
+    current = dict(old)
+
+    for row in new_rows:
+        vid = row[0]
+        prev = current.get(vid)
+        if prev is not None and tuple(prev[1:]) == tuple(row[1:]):
+            continue
+        if prev is not None:
+            t = totals[prev[1]]
+            t[0] -= 1
+            for i in range(4):
+                t[i + 1] -= int(prev[3 + i])
+            daily[(prev[1], _day(prev[2]))] -= 1
+        t = totals[row[1]]
+        t[0] += 1
+        for i in range(4):
+            t[i + 1] += int(row[3 + i])
+        daily[(row[1], _day(row[2]))] += 1
+        current[vid] = row
+
+    return (
+        {k: v for k, v in totals.items() if any(v)},
+        {k: v for k, v in daily.items() if v},
+    )
+
+
+async def apply_changes(cur: Any, old: dict[str, VideoRow], new_rows: list[VideoRow]) -> None:
+    # runs inside the ingest transaction, so counters commit together with the videos
+    totals, daily = collect_deltas(old, new_rows)
+
+    # sorted keys -> concurrent ingests lock rows in the same order (no deadlocks)
+    if totals:
+        await cur.executemany(
+            """
+            INSERT INTO creator_stats (
+              creator_id, videos_count, views_count, likes_count, comments_count, reports_count
+            )
+            VALUES (%s,%s,%s,%s,%s,%s)
+            ON CONFLICT (creator_id) DO UPDATE SET
+              videos_count=creator_stats.videos_count + EXCLUDED.videos_count,
+              views_count=creator_stats.views_count + EXCLUDED.views_count,
+              likes_count=creator_stats.likes_count + EXCLUDED.likes_count,
+              comments_count=creator_stats.comments_count + EXCLUDED.comments_count,
+              reports_count=creator_stats.reports_count + EXCLUDED.reports_count,
+              updated_at=NOW()
+            """,
+            [(c, *totals[c]) for c in sorted(totals)],
+        )
+    if daily:
+        await cur.executemany(
+            """
+            INSERT INTO creator_daily_publish (creator_id, day, videos_count)
+            VALUES (%s,%s,%s)
+            ON CONFLICT (creator_id, day) DO UPDATE SET
+              videos_count=creator_daily_publish.videos_count + EXCLUDED.videos_count
+            """,
+            [(c, d, daily[(c, d)]) for c, d in sorted(daily)],
+        )
+
+
+def stats_query(
+    pr: ParseResult,
+    window: Optional[tuple[datetime, datetime]],
+) -> Optional[tuple[str, tuple[Any, ...]]]:
+    # creator-scoped videos questions answerable from counters; None -> scan videos as usual
+    if pr.entity != "videos" or not pr.creator_id or pr.comparison != "none":
+        return None
+
+    if pr.operation == "count":
+        if window is None:
+            return "SELECT COALESCE(MAX(videos_count),0)::bigint FROM creator_stats WHERE creator_id = %s", (pr.creator_id,)
+        start, end = window
+        # window is [start, end) aligned to UTC days
+        return (
+            """
+            SELECT COALESCE(SUM(videos_count),0)::bigint
+            FROM creator_daily_publish
+            WHERE creator_id = %s AND day >= %s AND day < %s
+            """,
+            (pr.creator_id, start.date(), end.date()),
+        )
+
+    if pr.operation == "sum" and window is None:
+        col = FIELD_TO_COL.get(pr.field)
+        if col:
+            return f"SELECT COALESCE(MAX({col}),0)::bigint FROM creator_stats WHERE creator_id = %s", (pr.creator_id,)
+
+    return None
+
+
+async def find_mismatches(db: DB) -> list[tuple]:
+    # counters vs. a fresh aggregate over videos (both directions)
+    return await db.fetchall(
+        """
+        WITH fresh AS (
+          SELECT creator_id, COUNT(*)::bigint AS videos_count,
+                 SUM(views_count)::bigint AS views_count, SUM(likes_count)::bigint AS likes_count,
+                 SUM(comments_count)::bigint AS comments_count, SUM(reports_count)::bigint AS reports_count
+          FROM videos GROUP BY creator_id
+        ),
+        stored AS (
+          SELECT creator_id, videos_count, views_count, likes_count, comments_count, reports_count
+          FROM creator_stats WHERE videos_count <> 0
+        )
+        SELECT 'totals', creator_id FROM ((TABLE fresh EXCEPT TABLE stored) UNION (TABLE stored EXCEPT TABLE fresh)) d
+        UNION ALL
+        SELECT 'daily', creator_id FROM (
+          (SELECT creator_id, (video_created_at AT TIME ZONE 'UTC')::date, COUNT(*)::bigint FROM videos GROUP BY 1, 2
+           EXCEPT SELECT creator_id, day, videos_count FROM creator_daily_publish WHERE videos_count <> 0)
+          UNION
+          (SELECT creator_id, day, videos_count FROM creator_daily_publish WHERE videos_count <> 0
+           EXCEPT SELECT creator_id, (video_created_at AT TIME ZONE 'UTC')::date, COUNT(*)::bigint FROM videos GROUP BY 1, 2)
+        ) d
+        """
+    )
+
+
+async def rebuild(db: DB) -> None:
+    async with db.transaction() as conn:
+        # wait for in-flight ingest transactions, block new ones until commit
+        await lock_counters(conn)
+        await conn.execute("LOCK TABLE creator_stats, creator_daily_publish IN EXCLUSIVE MODE")
+        await conn.execute("TRUNCATE creator_stats, creator_daily_publish")
+        await conn.execute(
+            """
+            INSERT INTO creator_stats (creator_id, videos_count, views_count, likes_count, comments_count, reports_count)
+            SELECT creator_id, COUNT(*), SUM(views_count), SUM(likes_count), SUM(comments_count), SUM(reports_count)
+            FROM videos
+            GROUP BY creator_id
+            """
+        )
+        await conn.execute(
+            """
+            INSERT INTO creator_daily_publish (creator_id, day, videos_count)
+            SELECT creator_id, (video_created_at AT TIME ZONE 'UTC')::date, COUNT(*)
+            FROM videos
+            GROUP BY 1, 2
+            """
+        )
+
+
+async def main(dry_run: bool) -> int:
+    db = DB(load_settings().database_url)
+    await db.connect()
+    try:
+        bad = await find_mismatches(db)
+        creators = sorted({r[1] for r in bad})
+        print(f"Mismatching creators: {len(creators)}")
+        for c in creators[:20]:
+            print(f"  {c}")
+        if not dry_run:
+            await rebuild(db)
+            print("creator_stats rebuilt")
+    finally:
+        await db.close()
+    return 1 if (bad and dry_run) else 0
+
+
+if __name__ == "__main__":
+    p = argparse.ArgumentParser(description="Check creator_stats against videos and rebuild it from scratch")
+    p.add_argument("--dry-run", action="store_true", help="only report mismatches (exit 1 if any)")
+    a = p.parse_args(sys.argv[1:])
+    raise SystemExit(asyncio.run(main(a.dry_run)))
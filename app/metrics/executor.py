@@ -1,9 +1,12 @@
 from __future__ import annotations
 
+import asyncio
+from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
-from typing import Any
+from typing import Any, Optional
 
 from app.db import DB
+from app.metrics import creator_stats, summary
 from app.nlp.parser import ParseResult
 
 UTC = timezone.utc
@@ -34,6 +37,13 @@ def _dt_utc_period_bounds(date_from: str, date_to: str) -> tuple[datetime, datet
     end = d2.replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)  # inclusive
     return start, end
 
+def _time_window(pr: ParseResult) -> Optional[tuple[datetime, datetime]]:
+    if pr.date:
+        return _dt_utc_day_bounds(pr.date)
+    if pr.date_from and pr.date_to:
+        return _dt_utc_period_bounds(pr.date_from, pr.date_to)
+    return None
+
 VIDEO_FIELDS = {
     "views": "views_count",
     "likes": "likes_count",
@@ -55,19 +65,35 @@ SNAP_FIELDS = {
 
 CMP_OP = {"gt": ">", "lt": "<", "eq": "=", "gte": ">=", "lte": "<="}
 
-async def execute_metric(db: DB, pr: ParseResult) -> int:
+@dataclass(frozen=True)
+class _MetricSQL:
+    base_from: str
+    where: tuple[str, ...]  # creator + time window: shared by questions with the same scope
+    params: tuple[Any, ...]
+    cond: Optional[str]  # comparison, specific to the question
+    agg: str
+
+    def select(self, with_filter: bool = False) -> str:
+        agg = self.agg
+        if with_filter and self.cond:
+            agg = f"{agg} FILTER (WHERE {self.cond})"
+        if self.agg.startswith("SUM("):
+            agg = f"COALESCE({agg},0)"
+        return f"{agg}::bigint"
+
+def _metric_parts(pr: ParseResult) -> Optional[_MetricSQL]:
     params: list[Any] = []
     where: list[str] = []
 
     if pr.entity == "videos":
         base_from = "FROM videos v"
-        join = ""
         field_map = VIDEO_FIELDS
         time_col = "v.video_created_at"
         col = field_map.get(pr.field)
         if not col:
-            return 0
+            return None
         col_expr = f"v.{col}"
+        id_expr = "v.id"
 
         # creator filter
         if pr.creator_id:
@@ -79,53 +105,142 @@ async def execute_metric(db: DB, pr: ParseResult) -> int:
         field_map = SNAP_FIELDS
         col = field_map.get(pr.field)
         if not col:
-            return 0
+            return None
         col_expr = f"s.{col}"
+        id_expr = "s.video_id"
         time_col = "s.created_at"
 
-        join = ""
+        # creator is denormalized onto snapshots (migrations/002) -> no join
         if pr.creator_id:
-            # support creator filter for snapshots via join
-            join = " JOIN videos v ON v.id = s.video_id"
-            where.append("v.creator_id = %s")
+            where.append("s.creator_id = %s")
             params.append(pr.creator_id)
 
     # time filters
-    if pr.date:
-        start, end = _dt_utc_day_bounds(pr.date)
-        where.append(f"{time_col} >= %s")
-        where.append(f"{time_col} <  %s")
-        params.extend([start, end])
-    elif pr.date_from and pr.date_to:
-        start, end = _dt_utc_period_bounds(pr.date_from, pr.date_to)
+    window = _time_window(pr)
+    if window:
         where.append(f"{time_col} >= %s")
         where.append(f"{time_col} <  %s")
-        params.extend([start, end])
+        params.extend(window)
 
     # comparison
+    # columns are NOT NULL; the value is inlined (int) so the planner can match
+    # partial indexes like "delta_views_count < 0" even with prepared/generic plans
+    cond = None
     if pr.comparison != "none":
         op = CMP_OP.get(pr.comparison)
         if not op:
-            return 0
-        where.append(f"COALESCE({col_expr},0) {op} %s")
-        params.append(int(pr.value))
+            return None
+        if pr.field == "video_id":
+            return None  # comparing ids with a number means the counter was not recognized
+        cond = f"{col_expr} {op} {int(pr.value)}"
 
     # select
     if pr.operation == "count":
-        select = "COUNT(*)::bigint"
+        agg = "COUNT(*)"
     elif pr.operation == "distinct_count":
-        if pr.field != "video_id":
-            return 0
-        select = f"COUNT(DISTINCT {col_expr})::bigint"
+        # always distinct videos; field names the counter the comparison applies to
+        agg = f"COUNT(DISTINCT {id_expr})"
     elif pr.operation == "sum":
-        select = f"COALESCE(SUM(COALESCE({col_expr},0)),0)::bigint"
+        agg = f"SUM({col_expr})"
     else:
-        return 0
+        return None
+
+    return _MetricSQL(base_from, tuple(where), tuple(params), cond, agg)
 
-    sql = f"SELECT {select} {base_from}{join}"
+def build_metric_sql(pr: ParseResult) -> Optional[tuple[str, tuple[Any, ...]]]:
+    # None -> shape is not answerable (caller returns 0)
+    parts = _metric_parts(pr)
+    if parts is None:
+        return None
+    where = list(parts.where) + ([parts.cond] if parts.cond else [])
+    sql = f"SELECT {parts.select()} {parts.base_from}"
     if where:
         sql += " WHERE " + " AND ".join(where)
+    return sql, parts.params
+
+def build_batch_sql(prs: list[ParseResult]) -> Optional[tuple[str, tuple[Any, ...]]]:
+    # questions sharing entity, creator and window -> one scan, one aggregate per question
+    parts = [_metric_parts(pr) for pr in prs]
+    if not parts or any(p is None for p in parts):
+        return None
+    first = parts[0]
+    if any((p.base_from, p.where, p.params) != (first.base_from, first.where, first.params) for p in parts):
+        return None
+    sql = f"SELECT {', '.join(p.select(with_filter=True) for p in parts)} {first.base_from}"
+    if first.where:
+        sql += " WHERE " + " AND ".join(first.where)
+    return sql, first.params
+
+def fast_query(pr: ParseResult) -> Optional[tuple[str, tuple[Any, ...]]]:
+    # precomputed answers: creator counters, then the global videos summary/histogram
+    window = _time_window(pr)
+    return creator_stats.stats_query(pr, window) or summary.summary_query(pr, window)
 
-    val = await db.fetchval(sql, tuple(params))
+async def execute_metric(db: DB, pr: ParseResult) -> int:
+    # precomputed answer first (O(1) / O(days) / one bucket); NULL or any problem there -> regular scan
+    fast = fast_query(pr)
+    if fast is not None:
+        try:
+            val = await db.fetchval(*fast)
+            if val is not None:
+                return int(val)
+        except Exception:
+            pass
+
+    built = build_metric_sql(pr)
+    if built is None:
+        return 0
+    sql, params = built
+    val = await db.fetchval(sql, params)
     return int(val or 0)
 
+async def _execute_safe(db: DB, pr: ParseResult) -> int:
+    try:
+        return await execute_metric(db, pr)
+    except Exception:
+        return 0
+
+async def execute_metrics(db: DB, prs: list[ParseResult]) -> list[int]:
+    # several questions at once: same-scope scans are merged, the rest run concurrently on the pool;
+    # NEVER fails outward, a broken question answers 0
+    out = [0] * len(prs)
+    groups: dict[tuple, list[int]] = {}
+    singles: list[int] = []
+
+    for i, pr in enumerate(prs):
+        parts = _metric_parts(pr)
+        if parts is None:
+            continue
+        if fast_query(pr) is not None:
+            singles.append(i)  # precomputed answers beat any scan
+            continue
+        if not parts.where and parts.cond:
+            # no shared creator/window: merging would turn the comparison into a FILTER over
+            # the whole table and lose its (partial) index, run it on its own
+            singles.append(i)
+            continue
+        groups.setdefault((parts.base_from, parts.where, parts.params), []).append(i)
+
+    async def run_group(idx: list[int]) -> None:
+        built = build_batch_sql([prs[i] for i in idx])
+        if built is None:
+            return
+        try:
+            row = await db.fetchrow(*built)
+        except Exception:
+            return
+        for i, v in zip(idx, row or ()):
+            out[i] = int(v or 0)
+
+    async def run_single(i: int) -> None:
+        out[i] = await _execute_safe(db, prs[i])
+
+    tasks = []
+    for idx in groups.values():
+        if len(idx) == 1:
+            tasks.append(run_single(idx[0]))
+        else:
+            tasks.append(run_group(idx))
+    tasks.extend(run_single(i) for i in singles)
+    await asyncio.gather(*tasks)
+    return out
@@ -0,0 +1,193 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections import Counter, deque
+from dataclasses import dataclass, replace
+from datetime import date, datetime, timedelta, timezone
+from typing import Literal, Optional
+
+from app.db import DB
+from app.metrics.executor import execute_metric
+from app.nlp.parser import ParseResult, _month_bounds
+
+logger = logging.getLogger(__name__)
+
+UTC = timezone.utc
+
+# Learns the most frequent question shapes from recent traffic and, after every completed load
+# (data_version bump, migrations/006_data_version.sql) or day change, precomputes them in the
+# background for the relative dates users ask about: yesterday and the current month.
+# Answers are served from memory until the next data change is noticed (<= poll_sec later).
+
+Relative = Literal["none", "yesterday", "current_month"]
+
+
+@dataclass(frozen=True)
+class Shape:
+    pr: ParseResult  # date fields cleared
+    rel: Relative
+
+
+@dataclass(frozen=True)
+class _Entry:
+    value: int
+    cost_ms: float  # what executing it cold took -> time saved per hit
+
+
+def _today() -> date:
+    return datetime.now(UTC).date()
+
+
+def shape_of(pr: ParseResult, today: date) -> Optional[Shape]:
+    # None -> absolute dates that are not "yesterday"/"this month": not worth learning
+    bare = replace(pr, date=None, date_from=None, date_to=None)
+    if not pr.date and not pr.date_from and not pr.date_to:
+        return Shape(bare, "none")
+    if pr.date == (today - timedelta(days=1)).isoformat():
+        return Shape(bare, "yesterday")
+    if (pr.date_from, pr.date_to) == _month_bounds(today.year, today.month):
+        return Shape(bare, "current_month")
+    return None
+
+
+def instantiate(shape: Shape, rel: Relative, today: date) -> ParseResult:
+    if rel == "yesterday":
+        return replace(shape.pr, date=(today - timedelta(days=1)).isoformat())
+    if rel == "current_month":
+        df, dt = _month_bounds(today.year, today.month)
+        return replace(shape.pr, date_from=df, date_to=dt)
+    return shape.pr
+
+
+class HotAnswers:
+    def __init__(
+        self,
+        db: DB,
+        top_k: int = 20,
+        concurrency: int = 2,
+        poll_sec: float = 30.0,
+        history: int = 2_000,
+        report_sec: float = 600.0,
+    ):
+        self.db = db
+        self.top_k = top_k
+        self.poll_sec = poll_sec
+        self.report_sec = report_sec
+        self._sem = asyncio.Semaphore(concurrency)  # keep precompute off the hot path
+
+        self._recent: deque[Shape] = deque(maxlen=history)
+        self._counts: Counter[Shape] = Counter()
+        self._cache: dict[ParseResult, _Entry] = {}
+        self._version: Optional[int] = None
+        self._day: Optional[date] = None
+        self._task: Optional[asyncio.Task] = None
+        self._job: Optional[asyncio.Task] = None
+
+        self.hits = 0
+        self.misses = 0
+        self.saved_ms = 0.0
+        self.precomputed = 0
+
+    def observe(self, pr: ParseResult) -> None:
+        shape = shape_of(pr, _today())
+        if shape is None:
+            return
+        if len(self._recent) == self._recent.maxlen:
+            old = self._recent[0]
+            self._counts[old] -= 1
+            if self._counts[old] <= 0:
+                del self._counts[old]
+        self._recent.append(shape)
+        self._counts[shape] += 1
+
+    def lookup(self, pr: ParseResult) -> Optional[int]:
+        e = self._cache.get(pr)
+        if e is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.saved_ms += e.cost_ms
+        return e.value
+
+    def top_shapes(self) -> list[Shape]:
+        return [s for s, _ in self._counts.most_common(self.top_k)]
+
+    async def _current_version(self) -> Optional[int]:
+        v = await self.db.fetchval("SELECT version FROM data_version")
+        return int(v) if v is not None else None
+
+    async def _compute(self, pr: ParseResult, version: Optional[int]) -> None:
+        if pr in self._cache:
+            return
+        async with self._sem:
+            t0 = time.perf_counter()
+            try:
+                val = await execute_metric(self.db, pr)
+            except Exception:
+                return
+            cost = (time.perf_counter() - t0) * 1000.0
+        # data changed while computing -> the result may mix old and new rows
+        if version == self._version:
+            self._cache[pr] = _Entry(val, cost)
+            self.precomputed += 1
+
+    async def precompute(self) -> None:
+        today, version = _today(), self._version
+        todo: list[ParseResult] = []
+        for shape in self.top_shapes():
+            rels: tuple[Relative, ...] = ("none",) if shape.rel == "none" else ("yesterday", "current_month")
+            todo.extend(instantiate(shape, rel, today) for rel in rels)
+        t0 = time.perf_counter()
+        await asyncio.gather(*(self._compute(pr, version) for pr in dict.fromkeys(todo)))
+        logger.info(
+            "Precomputed hot answers: shapes=%d queries=%d in %.0fms",
+            len(self.top_shapes()), len(todo), (time.perf_counter() - t0) * 1000.0,
+        )
+
+    async def refresh(self) -> None:
+        # new data or a new day -> drop everything and precompute the top shapes again
+        version, today = await self._current_version(), _today()
+        if version == self._version and today == self._day:
+            return
+        self._version, self._day = version, today
+        self._cache.clear()
+        if self._job and not self._job.done():
+            self._job.cancel()
+        self._job = asyncio.create_task(self.precompute())
+
+    def report(self) -> None:
+        total = self.hits + self.misses
+        logger.info(
+            "Hot answers: hits=%d misses=%d hit_rate=%.1f%% saved=%.0fms cached=%d precomputed=%d",
+            self.hits, self.misses, 100.0 * self.hits / total if total else 0.0,
+            self.saved_ms, len(self._cache), self.precomputed,
+        )
+
+    async def run(self) -> None:
+        last_report = time.monotonic()
+        while True:
+            try:
+                await self.refresh()
+            except Exception:
+                logger.exception("Hot answers refresh failed")
+            if time.monotonic() - last_report >= self.report_sec:
+                last_report = time.monotonic()
+                self.report()
+            await asyncio.sleep(self.poll_sec)
+
+    def start(self) -> asyncio.Task:
+        self._task = asyncio.create_task(self.run())
+        return self._task
+
+    async def stop(self) -> None:
+        for t in (self._task, self._job):
+            if t and not t.done():
+                t.cancel()
+                try:
+                    await t
+                except asyncio.CancelledError:
+                    pass
+        self._task = self._job = None
+        self.report()
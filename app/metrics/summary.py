@@ -0,0 +1,227 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import sys
+from bisect import bisect_right
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Optional
+
+from app.config import load_settings
+from app.db import DB
+from app.metrics.creator_stats import lock_counters
+from app.nlp.parser import ParseResult
+
+# Global latest-state summary of `videos`: totals (one row) + per-counter histogram over fixed
+# 1-2-5 bucket boundaries. All-time totals are O(1); "videos with more than N views" is the sum
+# of whole buckets plus an exact (indexed) count inside the single bucket that contains N.
+# Maintained by ingest from the rows it changed (migrations/005_videos_summary.sql).
+
+def _boundaries() -> list[int]:
+    out, m = [0], 1
+    while m <= 10**12:
+        out.extend(k * m for k in (1, 2, 5) if k * m <= 10**12)
+        m *= 10
+    return out
+
+BOUNDARIES: list[int] = _boundaries()  # bucket i = [BOUNDARIES[i], BOUNDARIES[i+1])
+
+HIST_COLS = ("views_count", "likes_count", "comments_count", "reports_count")
+FIELD_TO_COL = {"views": "views_count", "likes": "likes_count", "comments": "comments_count", "reports": "reports_count"}
+
+# Video row layout shared with app.ingest.load_json:
+#   (id, creator_id, video_created_at, views, likes, comments, reports)
+
+
+def bucket_of(value: int) -> int:
+    return max(bisect_right(BOUNDARIES, value) - 1, 0)
+
+
+def collect_deltas(
+    old: dict[str, tuple],
+    new_rows: list[tuple],
+) -> tuple[list[int], dict[tuple[str, int], int]]:
+    totals = [0, 0, 0, 0, 0]
+    hist: dict[tuple[str, int], int] = defaultdict(int)
+    current = dict(old)
+
+    for row in new_rows:
+        prev = current.get(row[0])
+        if prev is not None and tuple(prev[3:7]) == tuple(row[3:7]):
+            current[row[0]] = row
+            continue
+        if prev is not None:
+            totals[0] -= 1
+            for i, col in enumerate(HIST_COLS):
+                totals[i + 1] -= int(prev[3 + i])
+                hist[(col, bucket_of(int(prev[3 + i])))] -= 1
+        totals[0] += 1
+        for i, col in enumerate(HIST_COLS):
+            totals[i + 1] += int(row[3 + i])
+            hist[(col, bucket_of(int(row[3 + i])))] += 1
+        current[row[0]] = row
+
+    return totals, {k: v for k, v in hist.items() if v}
+
+
+async def apply_changes(cur: Any, old: dict[str, tuple], new_rows: list[tuple]) -> None:
+    # runs inside the ingest transaction (after creator_stats: same lock order everywhere)
+    totals, hist = collect_deltas(old, new_rows)
+    if any(totals):
+        await cur.execute(
+            """
+            UPDATE videos_summary SET
+              videos_count=videos_count + %s,
+              views_count=views_count + %s,
+              likes_count=likes_count + %s,
+              comments_count=comments_count + %s,
+              reports_count=reports_count + %s,
+              updated_at=NOW()
+            """,
+            tuple(totals),
+        )
+    if hist:
+        await cur.executemany(
+            """
+            INSERT INTO videos_histogram (field, bucket, videos_count)
+            VALUES (%s,%s,%s)
+            ON CONFLICT (field, bucket) DO UPDATE SET
+              videos_count=videos_histogram.videos_count + EXCLUDED.videos_count
+            """,
+            [(f, b, hist[(f, b)]) for f, b in sorted(hist)],
+        )
+
+
+def summary_query(
+    pr: ParseResult,
+    window: Optional[tuple[datetime, datetime]],
+) -> Optional[tuple[str, tuple[Any, ...]]]:
+    # all-time, all-creators videos questions; the query returns NULL while the summary is empty
+    # (migration not applied / rebuild pending) so the caller falls back to the scan
+    if pr.entity != "videos" or pr.creator_id or window is not None:
+        return None
+
+    if pr.comparison == "none":
+        if pr.operation == "count":
+            return "SELECT videos_count FROM videos_summary", ()
+        if pr.operation == "sum" and pr.field in FIELD_TO_COL:
+            return f"SELECT {FIELD_TO_COL[pr.field]} FROM videos_summary", ()
+        return None
+
+    if pr.operation != "count" or pr.comparison not in ("gt", "gte", "lt", "lte"):
+        return None
+    col = FIELD_TO_COL.get(pr.field)
+    n = int(pr.value)
+    if not col or n < 0:
+        return None
+
+    k = bucket_of(n)
+    lo = BOUNDARIES[k]
+    hi = BOUNDARIES[k + 1] if k + 1 < len(BOUNDARIES) else None
+
+    # whole buckets strictly above / below the boundary bucket + exact count inside it
+    if pr.comparison in ("gt", "gte"):
+        buckets = "bucket > %s"
+        op = ">" if pr.comparison == "gt" else ">="
+        exact = f"{col} {op} {n}" + (f" AND {col} < {hi}" if hi is not None else "")
+    else:
+        buckets = "bucket < %s"
+        op = "<" if pr.comparison == "lt" else "<="
+        exact = f"{col} >= {lo} AND {col} {op} {n}"
+
+    return (
+        f"""
+        SELECT CASE WHEN EXISTS (SELECT 1 FROM videos_summary) THEN
+          (SELECT COALESCE(SUM(videos_count),0) FROM videos_histogram WHERE field = %s AND {buckets})
+          + (SELECT COUNT(*) FROM videos WHERE {exact})
+        END::bigint
+        """,
+        (col, k),
+    )
+
+
+async def find_mismatches(db: DB) -> list[str]:
+    out = []
+    fresh = await db.fetchrow(
+        """
+        SELECT COUNT(*), COALESCE(SUM(views_count),0), COALESCE(SUM(likes_count),0),
+               COALESCE(SUM(comments_count),0), COALESCE(SUM(reports_count),0)
+        FROM videos
+        """
+    )
+    stored = await db.fetchrow(
+        "SELECT videos_count, views_count, likes_count, comments_count, reports_count FROM videos_summary"
+    )
+    if stored is None or tuple(map(int, stored)) != tuple(map(int, fresh)):
+        out.append(f"totals: stored={stored} fresh={fresh}")
+
+    rows = await db.fetchall(
+        """
+        WITH fresh AS (
+          SELECT f.field, GREATEST(width_bucket(f.value, %s::bigint[]) - 1, 0) AS bucket, COUNT(*)::bigint AS videos_count
+          FROM videos v
+          CROSS JOIN LATERAL (VALUES
+            ('views_count', v.views_count), ('likes_count', v.likes_count),
+            ('comments_count', v.comments_count), ('reports_count', v.reports_count)
+          ) AS f(field, value)
+          GROUP BY 1, 2
+        ),
+        stored AS (SELECT field, bucket, videos_count FROM videos_histogram WHERE videos_count <> 0)
+        (TABLE fresh EXCEPT TABLE stored) UNION (TABLE stored EXCEPT TABLE fresh)
+        """,
+        (BOUNDARIES,),
+    )
+    out.extend(f"histogram: {r[0]}[{r[1]}]" for r in rows)
+    return out
+
+
+async def rebuild(db: DB) -> None:
+    async with db.transaction() as conn:
+        await lock_counters(conn)
+        await conn.execute("LOCK TABLE videos_summary, videos_histogram IN EXCLUSIVE MODE")
+        await conn.execute("TRUNCATE videos_summary, videos_histogram")
+        await conn.execute(
+            """
+            INSERT INTO videos_summary (id, videos_count, views_count, likes_count, comments_count, reports_count)
+            SELECT TRUE, COUNT(*), COALESCE(SUM(views_count),0), COALESCE(SUM(likes_count),0),
+                   COALESCE(SUM(comments_count),0), COALESCE(SUM(reports_count),0)
+            FROM videos
+            """
+        )
+        await conn.execute(
+            """
+            INSERT INTO videos_histogram (field, bucket, videos_count)
+            SELECT f.field, GREATEST(width_bucket(f.value, %s::bigint[]) - 1, 0), COUNT(*)
+            FROM videos v
+            CROSS JOIN LATERAL (VALUES
+              ('views_count', v.views_count), ('likes_count', v.likes_count),
+              ('comments_count', v.comments_count), ('reports_count', v.reports_count)
+            ) AS f(field, value)
+            GROUP BY 1, 2
+            """,
+            (BOUNDARIES,),
+        )
+
+
+async def main(dry_run: bool) -> int:
+    db = DB(load_settings().database_url)
+    await db.connect()
+    try:
+        bad = await find_mismatches(db)
+        print(f"Mismatches: {len(bad)}")
+        for line in bad[:20]:
+            print(f"  {line}")
+        if not dry_run:
+            await rebuild(db)
+            print("videos_summary rebuilt")
+    finally:
+        await db.close()
+    return 1 if (bad and dry_run) else 0
+
+
+if __name__ == "__main__":
+    p = argparse.ArgumentParser(description="Check videos_summary/videos_histogram against videos and rebuild")
+    p.add_argument("--dry-run", action="store_true", help="only report mismatches (exit 1 if any)")
+    a = p.parse_args(sys.argv[1:])
+    raise SystemExit(asyncio.run(main(a.dry_run)))
@@ -1,8 +1,10 @@
 from __future__ import annotations
 
+import asyncio
 import re
+from contextlib import nullcontext
 from dataclasses import dataclass
-from datetime import date, timedelta
+from datetime import date, datetime, timedelta, timezone
 from typing import Any, Optional, Literal
 
 import httpx
@@ -89,7 +91,30 @@ def _month_bounds(y: int, m: int) -> tuple[str, str]:
     last_day = first_next - timedelta(days=1)
     return f"{y:04d}-{m:02d}-01", f"{last_day.year:04d}-{last_day.month:02d}-{last_day.day:02d}"
 
-def extract_dates_ru(text: str) -> dict[str, str]:
+_RE_THIS_MONTH = re.compile(r"\b(?:в\s+этом|за\s+этот|в\s+текущем|за\s+текущий)\s+месяц", re.IGNORECASE)
+_RE_LAST_MONTH = re.compile(r"\b(?:в\s+прошлом|за\s+прошлый|в\s+прошедшем)\s+месяц", re.IGNORECASE)
+
+def _today_utc() -> date:
+    return datetime.now(timezone.utc).date()
+
+def _relative_dates_ru(t: str, today: date) -> dict[str, str]:
+    # "позавчера" contains "вчера" -> check it first
+    if "позавчера" in t:
+        return {"date": (today - timedelta(days=2)).isoformat()}
+    if "вчера" in t:
+        return {"date": (today - timedelta(days=1)).isoformat()}
+    if "сегодня" in t:
+        return {"date": today.isoformat()}
+    if _RE_THIS_MONTH.search(t):
+        df, dt = _month_bounds(today.year, today.month)
+        return {"date_from": df, "date_to": dt}
+    if _RE_LAST_MONTH.search(t):
+        prev = today.replace(day=1) - timedelta(days=1)
+        df, dt = _month_bounds(prev.year, prev.month)
+        return {"date_from": df, "date_to": dt}
+    return {}
+
+def extract_dates_ru(text: str, today: Optional[date] = None) -> dict[str, str]:
     t = text.lower()
 
     # "в июне 2025 года" -> month range
@@ -133,7 +158,8 @@ def extract_dates_ru(text: str) -> dict[str, str]:
     if len(iso_all) == 1:
         return {"date": iso_all[0]}
 
-    return {}
+    # relative: "вчера", "сегодня", "в этом/прошлом месяце" (UTC, like the executor's day bounds)
+    return _relative_dates_ru(t, today or _today_utc())
 
 @dataclass(frozen=True)
 class ParseResult:
@@ -167,6 +193,28 @@ def _extract_json(text: str) -> dict[str, Any]:
 
     return orjson.loads(cleaned)
 
+def _base_counter(t: str) -> str:
+    if "лайк" in t:
+        return "likes"
+    if "коммент" in t:
+        return "comments"
+    if "жалоб" in t or "репорт" in t:
+        return "reports"
+    return "views"
+
+def _compared_counter(t: str, entity: str) -> str:
+    # the counter a comparison applies to ("больше 500 лайков", "получали новые просмотры");
+    # on snapshots that is the hourly delta
+    base = _base_counter(t)
+    return f"delta_{base}" if entity == "snapshots" else base
+
+# "получали/получили новые просмотры", "новые лайки" = videos whose hourly delta was > 0
+_RE_NEW_ACTIVITY = re.compile(r"получ\w*\s+новые|новые\s+(?:просмотр|лайк|коммент|жалоб|репорт)")
+
+def _is_growth_sum(t: str) -> bool:
+    # "на сколько просмотров выросли ..." = growth = sum of hourly deltas
+    return "на сколько" in t and any(w in t for w in ["вырос", "прибав", "увелич"])
+
 def _heuristic_parse(text: str) -> ParseResult:
     t = text.lower().replace("\u00A0", " ")
 
@@ -179,25 +227,23 @@ def _heuristic_parse(text: str) -> ParseResult:
     if any(w in t for w in ["замеров статистики", "замеров", "снапшотов"]):
         entity = "snapshots"
 
+    growth_sum = _is_growth_sum(t)
+    new_activity = "видео" in t and bool(_RE_NEW_ACTIVITY.search(t))
+    if growth_sum or new_activity:
+        entity = "snapshots"
+
     # field
-    if "лайк" in t:
-        base = "likes"
-    elif "коммент" in t:
-        base = "comments"
-    elif "жалоб" in t or "репорт" in t:
-        base = "reports"
-    else:
-        base = "views"
+    base = _base_counter(t)
 
-    if entity == "snapshots" and any(w in t for w in ["за час", "приращ", "динамик", "стало меньше", "стало больше", "по сравнению"]):
+    if entity == "snapshots" and (growth_sum or any(w in t for w in ["за час", "приращ", "динамик", "стало меньше", "стало больше", "по сравнению"])):
         field = f"delta_{base}"
     else:
         field = base
 
     # operation
-    if "суммар" in t or "в сумме" in t:
+    if growth_sum or "суммар" in t or "в сумме" in t:
         operation: Operation = "sum"
-    elif "сколько разных видео" in t or "разных видео" in t:
+    elif new_activity or "сколько разных видео" in t or "разных видео" in t:
         operation = "distinct_count"
         field = "video_id"
         if entity != "snapshots":
@@ -213,7 +259,7 @@ def _heuristic_parse(text: str) -> ParseResult:
 
     if any(w in t for w in ["отриц", "стало меньше", "уменьш"]):
         comparison, value = "lt", 0
-    elif any(w in t for w in ["вырос", "стало больше", "прибав", "получали новые"]):
+    elif new_activity or (not growth_sum and any(w in t for w in ["вырос", "стало больше", "прибав"])):
         comparison, value = "gt", 0
 
     thr = extract_threshold_ru(text)
@@ -225,6 +271,11 @@ def _heuristic_parse(text: str) -> ParseResult:
             comparison = "gt"
         value = thr
 
+    # "Сколько (разных) видео ... больше N лайков / получали новые просмотры":
+    # compare the counter the question names, not the id
+    if comparison != "none" and field == "video_id":
+        field = _compared_counter(t, entity)
+
     # creator_id
     creator_id = None
     # RU/EN: "креатор с id <id>", "creator id <id>", "id <id>", creator_id=<id>
@@ -264,7 +315,8 @@ def _heuristic_parse(text: str) -> ParseResult:
         date_to=date_to,
     )
 
-def _validate_and_normalize(obj: dict[str, Any], text: str) -> ParseResult:
+def _validate_and_normalize(obj: dict[str, Any], text: str) -> tuple[ParseResult, str]:
+    # returns (result, path): "llm" or "heuristic" when the model output was unusable
     # defaults if missing
     entity = obj.get("entity")
     operation = obj.get("operation")
@@ -330,7 +382,7 @@ def _validate_and_normalize(obj: dict[str, Any], text: str) -> ParseResult:
 
     # if operation/entity/field are missing -> fallback fully
     if not entity or not operation or not isinstance(field, str) or not field.strip():
-        return _heuristic_parse(text)
+        return _heuristic_parse(text), "heuristic"
 
     # fill missing pieces using heuristics lightly
     pr = ParseResult(
@@ -355,8 +407,12 @@ def _validate_and_normalize(obj: dict[str, Any], text: str) -> ParseResult:
     t = text.lower()
     if "отриц" in t or "стало меньше" in t:
         pr = ParseResult(**{**pr.__dict__, "comparison": "lt", "value": 0})
-    if "получали новые" in t and "видео" in t:
-        pr = ParseResult(**{**pr.__dict__, "entity": "snapshots", "operation": "distinct_count", "field": "video_id", "comparison": "gt", "value": 0})
+    if _is_growth_sum(t):
+        pr = ParseResult(**{**pr.__dict__, "entity": "snapshots", "operation": "sum", "field": f"delta_{_base_counter(t)}", "comparison": "none", "value": 0})
+    if "видео" in t and _RE_NEW_ACTIVITY.search(t):
+        pr = ParseResult(**{**pr.__dict__, "entity": "snapshots", "operation": "distinct_count", "field": _compared_counter(t, "snapshots"), "comparison": "gt", "value": 0})
+    if pr.comparison != "none" and pr.field == "video_id":
+        pr = ParseResult(**{**pr.__dict__, "field": _compared_counter(t, pr.entity)})
 
     # HARD OVERRIDE: publication-date queries must use videos.video_created_at
     t_pub = text.lower()
@@ -381,17 +437,63 @@ def _validate_and_normalize(obj: dict[str, Any], text: str) -> ParseResult:
             date=date_,
             date_from=date_from,
             date_to=date_to,
-        )
-
-    return pr
+        ), "llm"
+
+    return pr, "llm"
+
+# which path answered parse_query (read by load tests / monitoring)
+PARSE_STATS: dict[str, int] = {"llm": 0, "heuristic": 0}
+
+# "1) ...", "2. ...", "- ...", "• ..." list markers in front of pasted questions
+_RE_LIST_MARKER = re.compile(r"^\s*(?:\d{1,2}\s*[.)]|[-•*—])\s+")
+
+_RE_QUESTION_START = re.compile(
+    r"^(?:на\s+сколько|сколько|какое|какой|какая|какие|каков\w*|чему|посчитай|подсчитай|найди|покажи)\b",
+    re.IGNORECASE,
+)
+
+def split_questions(text: str) -> list[str]:
+    # a line starts a new question when it has a "1) ..."/"- ..." marker, starts with a
+    # question word ("Сколько ...", "Какое ...") or the previous line ended with "?";
+    # any other line continues the previous one (a question wrapped across lines)
+    lines = [ln.strip() for ln in text.replace("\r", "\n").split("\n")]
+    lines = [ln for ln in lines if any(ch.isalpha() for ch in ln)]
+    if len(lines) <= 1:
+        return lines or [text.strip()]
+
+    items: list[str] = []
+    for ln in lines:
+        marked = bool(_RE_LIST_MARKER.match(ln))
+        ln = _RE_LIST_MARKER.sub("", ln).strip()
+        if not items or marked or items[-1].endswith("?") or _RE_QUESTION_START.match(ln):
+            items.append(ln)
+        else:
+            items[-1] = f"{items[-1]} {ln}"
+    return items
 
-async def parse_query(ollama_url: str, model: str, text: str) -> ParseResult:
+async def parse_query(
+    ollama_url: str,
+    model: str,
+    text: str,
+    gate: Optional[asyncio.Semaphore] = None,
+    use_llm: bool = True,
+    keep_alive: Optional[str] = None,
+) -> ParseResult:
     # Try LLM, but NEVER die: fallback to heuristic
+    # gate bounds concurrent model calls (several questions from one message, many users)
+    # use_llm=False -> model is not warm yet, heuristic only
+    if not use_llm:
+        PARSE_STATS["heuristic"] += 1
+        return _heuristic_parse(text)
     try:
-        llm_out = await ollama_chat(ollama_url, model, text)
+        async with gate or nullcontext():
+            llm_out = await ollama_chat(ollama_url, model, text, keep_alive=keep_alive)
         obj = _extract_json(llm_out)
-        return _validate_and_normalize(obj, text)
+        pr, path = _validate_and_normalize(obj, text)
+        PARSE_STATS[path] += 1
+        return pr
     except Exception:
+        PARSE_STATS["heuristic"] += 1
         return _heuristic_parse(text)
 
 async def ollama_chat(
@@ -399,10 +501,15 @@ async def ollama_chat(
     model: str,
     user_text: str,
     timeout_sec: float = 60.0,
+    keep_alive: Optional[str] = None,
 ) -> str:
     url = ollama_url.rstrip("/") + "/api/generate"
-    prompt = f"{SYSTEM_PROMPT}\n\nUSER: {user_text}\nASSISTANT:"
-    payload = {"model": model, "prompt": prompt, "stream": False, "options": {"temperature": 0}}
+    # date goes after the fixed prompt so the primed prefix (app.nlp.warmup) is reused
+    prompt = f"{SYSTEM_PROMPT}\n\nСегодня: {_today_utc().isoformat()}\nUSER: {user_text}\nASSISTANT:"
+    payload: dict[str, Any] = {"model": model, "prompt": prompt, "stream": False, "options": {"temperature": 0}}
+    if keep_alive:
+        # how long Ollama keeps the model in memory after this call ("30m", "-1" = forever)
+        payload["keep_alive"] = keep_alive
 
     async with httpx.AsyncClient(timeout=timeout_sec) as client:
         r = await client.post(url, json=payload)
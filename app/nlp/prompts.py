@@ -20,10 +20,12 @@ SYSTEM_PROMPT = r"""
 
 Правила:
 - Всегда ISO дата: YYYY-MM-DD.
+- "сегодня", "вчера", "в этом месяце", "в прошлом месяце" считай от строки "Сегодня: YYYY-MM-DD" перед вопросом; месяц => date_from/date_to.
 - "по итоговой статистике", "итоговые", "финальные", "опубликованные" => entity="videos"
 - "замеры", "снапшоты", "за час", "по сравнению с предыдущим", "приращение", "динамика" => entity="snapshots"
 - "Сколько всего ..." => operation="count", comparison="none"
-- "Сколько разных видео ..." => operation="distinct_count", field="video_id"
+- "Сколько разных видео ..." => operation="distinct_count" (считаются разные видео), field = счётчик из условия
+- Если есть сравнение (больше N, не менее N, отрицательные, новые), field = счётчик, который сравнивается (views, likes, delta_views, ...), а не video_id
 - "в сумме", "суммарное количество" => operation="sum"
 - "больше N" => comparison="gt", value=N
 - "не менее N" => comparison="gte", value=N
@@ -40,6 +42,9 @@ SYSTEM_PROMPT = r"""
 Вопрос: "Сколько всего есть замеров, в которых просмотры за час оказались отрицательными?"
 Ответ: {"entity":"snapshots","operation":"count","field":"delta_views","comparison":"lt","value":0}
 
+Вопрос: "Сколько разных видео получали новые лайки 27 ноября 2025?"
+Ответ: {"entity":"snapshots","operation":"distinct_count","field":"delta_likes","comparison":"gt","value":0,"date":"2025-11-27"}
+
 Вопрос: "Какое суммарное количество просмотров набрали все видео, опубликованные в июне 2025 года?"
 Ответ: {"entity":"videos","operation":"sum","field":"views","comparison":"none","value":0,"date_from":"2025-06-01","date_to":"2025-06-30"}
 """.strip()
@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from typing import Optional
+
+import httpx
+
+from app.nlp.parser import ollama_chat
+
+logger = logging.getLogger(__name__)
+
+# question used to prime the model: the prompt starts with SYSTEM_PROMPT, so after this call
+# Ollama has the model in memory and the shared prompt prefix evaluated
+_PRIME_QUESTION = "Сколько всего видео есть в системе?"
+
+
+def _model_matches(name: str, model: str) -> bool:
+    # "llama3" is listed by Ollama as "llama3:latest"
+    return name == model or (":" not in model and name == f"{model}:latest")
+
+
+# Pre-loads the Ollama model at startup and keeps it resident while the bot runs.
+# `ready` stays False until the model answered a priming request; until then the bot
+# serves questions with the heuristic parser only.
+class ModelWarmer:
+    def __init__(
+        self,
+        ollama_url: str,
+        model: str,
+        keep_alive: str = "30m",
+        interval_sec: float = 240.0,
+        load_timeout_sec: float = 600.0,
+    ):
+        self.ollama_url = ollama_url.rstrip("/")
+        self.model = model
+        self.keep_alive = keep_alive
+        self.interval_sec = interval_sec
+        self.load_timeout_sec = load_timeout_sec
+
+        self.ready = False
+        self.started_at = time.monotonic()
+        self.cold_start_ms: Optional[float] = None
+        self.warmups = 0
+        self.keepalive_failures = 0
+        self._task: Optional[asyncio.Task] = None
+
+    async def _load(self) -> None:
+        # generate without a prompt only loads the model (and sets keep_alive)
+        async with httpx.AsyncClient(timeout=self.load_timeout_sec) as client:
+            r = await client.post(
+                f"{self.ollama_url}/api/generate",
+                json={"model": self.model, "keep_alive": self.keep_alive, "stream": False},
+            )
+            r.raise_for_status()
+
+    async def is_loaded(self) -> bool:
+        # readiness: model is listed among the running ones
+        async with httpx.AsyncClient(timeout=10.0) as client:
+            r = await client.get(f"{self.ollama_url}/api/ps")
+            r.raise_for_status()
+            models = r.json().get("models") or []
+        return any(_model_matches(str(m.get("name") or m.get("model") or ""), self.model) for m in models)
+
+    async def warm_up(self) -> bool:
+        t0 = time.perf_counter()
+        try:
+            await self._load()
+            await ollama_chat(
+                self.ollama_url, self.model, _PRIME_QUESTION,
+                timeout_sec=self.load_timeout_sec, keep_alive=self.keep_alive,
+            )
+            if not await self.is_loaded():
+                raise RuntimeError("model not listed in /api/ps after load")
+        except Exception as e:
+            logger.warning("LLM warm-up failed (%s); heuristic parser only", e)
+            self.ready = False
+            return False
+
+        self.warmups += 1
+        took = (time.perf_counter() - t0) * 1000.0
+        if self.cold_start_ms is None:
+            self.cold_start_ms = took
+        self.ready = True
+        logger.info(
+            "LLM ready: model=%s warm-up=%.0fms (%.1fs since start)",
+            self.model, took, time.monotonic() - self.started_at,
+        )
+        return True
+
+    async def _keepalive(self) -> None:
+        try:
+            await self._load()
+            ok = await self.is_loaded()
+        except Exception:
+            ok = False
+        if ok:
+            return
+        self.keepalive_failures += 1
+        logger.warning("LLM not resident anymore (model=%s); re-warming", self.model)
+        self.ready = False
+        await self.warm_up()
+
+    async def run(self) -> None:
+        # warm-up with backoff, then periodic keep-alive + readiness check
+        delay = 5.0
+        while not await self.warm_up():
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.interval_sec)
+        while True:
+            await asyncio.sleep(self.interval_sec)
+            await self._keepalive()
+
+    def start(self) -> asyncio.Task:
+        self._task = asyncio.create_task(self.run())
+        return self._task
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
@@ -0,0 +1,62 @@
+-- Denormalized creator on snapshots: creator-scoped snapshot questions no longer join videos
+ALTER TABLE video_snapshots ADD COLUMN IF NOT EXISTS creator_id TEXT;
+
+UPDATE video_snapshots s
+SET creator_id = v.creator_id
+FROM videos v
+WHERE v.id = s.video_id
+  AND s.creator_id IS DISTINCT FROM v.creator_id;
+
+ALTER TABLE video_snapshots ALTER COLUMN creator_id SET NOT NULL;
+
+-- keep snapshots in sync when a video moves to another creator
+CREATE OR REPLACE FUNCTION video_snapshots_sync_creator() RETURNS trigger AS $$
+BEGIN
+  UPDATE video_snapshots SET creator_id = NEW.creator_id WHERE video_id = NEW.id;
+  RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_videos_creator_sync ON videos;
+CREATE TRIGGER trg_videos_creator_sync
+  AFTER UPDATE OF creator_id ON videos
+  FOR EACH ROW
+  WHEN (OLD.creator_id IS DISTINCT FROM NEW.creator_id)
+  EXECUTE FUNCTION video_snapshots_sync_creator();
+
+-- Snapshots by time: day/period sums and distinct counts as index-only scans
+CREATE INDEX IF NOT EXISTS idx_snapshots_created_at_cover
+  ON video_snapshots(created_at)
+  INCLUDE (video_id, delta_views_count, delta_likes_count, delta_comments_count, delta_reports_count);
+
+-- superseded by idx_snapshots_created_at_cover
+DROP INDEX IF EXISTS idx_snapshots_created_at;
+
+-- Negative deltas are rare: whole-history counts read only these entries
+CREATE INDEX IF NOT EXISTS idx_snapshots_neg_views
+  ON video_snapshots(created_at) INCLUDE (video_id)
+  WHERE delta_views_count < 0;
+
+CREATE INDEX IF NOT EXISTS idx_snapshots_neg_likes
+  ON video_snapshots(created_at) INCLUDE (video_id)
+  WHERE delta_likes_count < 0;
+
+-- "Сколько разных видео получали новые просмотры" within a day
+CREATE INDEX IF NOT EXISTS idx_snapshots_pos_views
+  ON video_snapshots(created_at, video_id)
+  WHERE delta_views_count > 0;
+
+-- Creator-scoped snapshot questions
+CREATE INDEX IF NOT EXISTS idx_snapshots_creator_created_at
+  ON video_snapshots(creator_id, created_at)
+  INCLUDE (video_id, delta_views_count, delta_likes_count, delta_comments_count, delta_reports_count);
+
+-- Videos published in a period: counts and sums without heap fetches
+CREATE INDEX IF NOT EXISTS idx_videos_created_at_cover
+  ON videos(video_created_at)
+  INCLUDE (views_count, likes_count, comments_count, reports_count);
+
+-- Creator totals / "у креатора ... больше N просмотров"
+CREATE INDEX IF NOT EXISTS idx_videos_creator_views
+  ON videos(creator_id, views_count)
+  INCLUDE (likes_count, comments_count, reports_count);
@@ -0,0 +1,30 @@
+-- Per-creator counters, maintained incrementally by ingest (app.metrics.creator_stats)
+CREATE TABLE IF NOT EXISTS creator_stats (
+  creator_id TEXT PRIMARY KEY,
+  videos_count BIGINT NOT NULL DEFAULT 0,
+  views_count BIGINT NOT NULL DEFAULT 0,
+  likes_count BIGINT NOT NULL DEFAULT 0,
+  comments_count BIGINT NOT NULL DEFAULT 0,
+  reports_count BIGINT NOT NULL DEFAULT 0,
+  updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+-- videos published per creator per UTC day (videos.video_created_at)
+CREATE TABLE IF NOT EXISTS creator_daily_publish (
+  creator_id TEXT NOT NULL,
+  day DATE NOT NULL,
+  videos_count BIGINT NOT NULL DEFAULT 0,
+  PRIMARY KEY (creator_id, day)
+);
+
+INSERT INTO creator_stats (creator_id, videos_count, views_count, likes_count, comments_count, reports_count)
+SELECT creator_id, COUNT(*), SUM(views_count), SUM(likes_count), SUM(comments_count), SUM(reports_count)
+FROM videos
+GROUP BY creator_id
+ON CONFLICT (creator_id) DO NOTHING;
+
+INSERT INTO creator_daily_publish (creator_id, day, videos_count)
+SELECT creator_id, (video_created_at AT TIME ZONE 'UTC')::date, COUNT(*)
+FROM videos
+GROUP BY 1, 2
+ON CONFLICT (creator_id, day) DO NOTHING;
@@ -0,0 +1,26 @@
+-- Files seen by the ingest daemon (app.ingest.daemon); identity = path + size + mtime
+CREATE TABLE IF NOT EXISTS ingest_files (
+  id BIGSERIAL PRIMARY KEY,
+  path TEXT NOT NULL,
+  size BIGINT NOT NULL,
+  mtime_ns BIGINT NOT NULL,
+  chunk_size INT NOT NULL,
+  total_chunks INT,
+  status TEXT NOT NULL DEFAULT 'pending',  -- pending | running | done | failed
+  error TEXT,
+  discovered_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+  started_at TIMESTAMPTZ,
+  finished_at TIMESTAMPTZ,
+  updated_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+  UNIQUE (path, size, mtime_ns)
+);
+
+-- One row per committed chunk, written in the same transaction as the chunk's data
+CREATE TABLE IF NOT EXISTS ingest_chunks (
+  file_id BIGINT NOT NULL REFERENCES ingest_files(id) ON DELETE CASCADE,
+  chunk_no INT NOT NULL,
+  videos INT NOT NULL,
+  snapshots INT NOT NULL,
+  committed_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+  PRIMARY KEY (file_id, chunk_no)
+);
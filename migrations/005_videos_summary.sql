@@ -0,0 +1,42 @@
+-- Latest-state summary of videos, maintained incrementally by ingest (app.metrics.summary)
+CREATE TABLE IF NOT EXISTS videos_summary (
+  id BOOLEAN PRIMARY KEY DEFAULT TRUE CHECK (id),  -- single row
+  videos_count BIGINT NOT NULL DEFAULT 0,
+  views_count BIGINT NOT NULL DEFAULT 0,
+  likes_count BIGINT NOT NULL DEFAULT 0,
+  comments_count BIGINT NOT NULL DEFAULT 0,
+  reports_count BIGINT NOT NULL DEFAULT 0,
+  updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+-- videos per counter value bucket; bucket i = [BOUNDARIES[i], BOUNDARIES[i+1]),
+-- boundaries must match app.metrics.summary.BOUNDARIES
+CREATE TABLE IF NOT EXISTS videos_histogram (
+  field TEXT NOT NULL,  -- views_count | likes_count | comments_count | reports_count
+  bucket INT NOT NULL,
+  videos_count BIGINT NOT NULL DEFAULT 0,
+  PRIMARY KEY (field, bucket)
+);
+
+-- exact scans of a single boundary bucket
+CREATE INDEX IF NOT EXISTS idx_videos_likes ON videos(likes_count);
+CREATE INDEX IF NOT EXISTS idx_videos_comments ON videos(comments_count);
+CREATE INDEX IF NOT EXISTS idx_videos_reports ON videos(reports_count);
+
+INSERT INTO videos_summary (id, videos_count, views_count, likes_count, comments_count, reports_count)
+SELECT TRUE, COUNT(*), COALESCE(SUM(views_count),0), COALESCE(SUM(likes_count),0),
+       COALESCE(SUM(comments_count),0), COALESCE(SUM(reports_count),0)
+FROM videos
+ON CONFLICT (id) DO NOTHING;
+
+INSERT INTO videos_histogram (field, bucket, videos_count)
+SELECT f.field, GREATEST(width_bucket(f.value, ARRAY[0,1,2,5,10,20,50,100,200,500,1000,2000,5000,10000,20000,50000,100000,200000,500000,1000000,2000000,5000000,10000000,20000000,50000000,100000000,200000000,500000000,1000000000,2000000000,5000000000,10000000000,20000000000,50000000000,100000000000,200000000000,500000000000,1000000000000]::bigint[]) - 1, 0), COUNT(*)
+FROM videos v
+CROSS JOIN LATERAL (VALUES
+  ('views_count', v.views_count),
+  ('likes_count', v.likes_count),
+  ('comments_count', v.comments_count),
+  ('reports_count', v.reports_count)
+) AS f(field, value)
+GROUP BY 1, 2
+ON CONFLICT (field, bucket) DO NOTHING;
@@ -0,0 +1,10 @@
+-- Bumped once per completed load (end of app.ingest.load_json.main, or when the ingest daemon marks
+-- a file done); lets the bot notice new data cheaply (app.metrics.precompute)
+CREATE TABLE IF NOT EXISTS data_version (
+  id BOOLEAN PRIMARY KEY DEFAULT TRUE CHECK (id),  -- single row
+  version BIGINT NOT NULL DEFAULT 0,
+  updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+INSERT INTO data_version (id, version) VALUES (TRUE, 0)
+ON CONFLICT (id) DO NOTHING;